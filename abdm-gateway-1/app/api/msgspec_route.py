@@ -0,0 +1,36 @@
+"""msgspec-based body decoding and response encoding for hot routes.
+
+msgspec decodes and validates JSON in C in a single pass, which is
+considerably cheaper than running the body through Pydantic. Routes that
+use these helpers take the raw `Request` and return a pre-encoded
+`Response`, bypassing FastAPI's response_model re-validation as well.
+"""
+from typing import Type, TypeVar
+
+import msgspec
+from fastapi import HTTPException, Request, Response, status
+
+T = TypeVar("T", bound=msgspec.Struct)
+
+
+async def decode_body(request: Request, struct_type: Type[T]) -> T:
+    """Decode and validate the JSON request body into a msgspec Struct."""
+    try:
+        return msgspec.json.decode(await request.body(), type=struct_type)
+    except msgspec.ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    except msgspec.DecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Malformed JSON body: {e}"
+        )
+
+
+def msgspec_response(obj, status_code: int = status.HTTP_200_OK) -> Response:
+    """Encode a msgspec Struct (or plain dict) straight to a JSON response."""
+    return Response(
+        content=msgspec.json.encode(obj),
+        media_type="application/json",
+        status_code=status_code,
+    )
@@ -16,16 +16,19 @@ from app.database.connection import get_db
 
 router = APIRouter(prefix="/consent", tags=["consent"])
 
-@router.post("/init", response_model=ConsentInitResponse)
+# Responses are built from freshly written/read DB state the services already
+# normalized, so they skip re-validation via model_construct and no
+# response_model (FastAPI would otherwise run a second Pydantic pass).
+@router.post("/init")
 async def init_consent_endpoint(
     body: ConsentInitRequest,
     token=Depends(get_current_token),
     headers=Depends(require_gateway_headers),
     db: AsyncSession = Depends(get_db)
 ):
-    return ConsentInitResponse(**(await init_consent(body.patientId, body.hipId, body.purpose.dict(), db)))
+    return ConsentInitResponse.model_construct(**(await init_consent(body.patientId, body.hipId, body.purpose.dict(), db)))
 
-@router.get("/status/{consentRequestId}", response_model=ConsentStatusResponse)
+@router.get("/status/{consentRequestId}")
 async def get_status_endpoint(
     consentRequestId: str,
     token=Depends(get_current_token),
@@ -35,9 +38,9 @@ async def get_status_endpoint(
     consent = await get_consent_status(consentRequestId, db)
     if not consent:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Consent request not found")
-    return ConsentStatusResponse(**consent)
+    return ConsentStatusResponse.model_construct(**consent)
 
-@router.post("/fetch", response_model=ConsentFetchResponse)
+@router.post("/fetch")
 async def fetch_consent_endpoint(
     body: ConsentFetchRequest,
     token=Depends(get_current_token),
@@ -47,7 +50,7 @@ async def fetch_consent_endpoint(
     consent = await fetch_consent(body.consentRequestId, db)
     if not consent:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Consent not found")
-    return ConsentFetchResponse(**consent)
+    return ConsentFetchResponse.model_construct(**consent)
 
 @router.post("/notify")
 async def notify_consent_endpoint(
@@ -39,7 +39,7 @@ class HIPDataResponse(BaseModel):
 
 
 # New endpoints for refactored flow
-@router.post("/request", response_model=dict)
+@router.post("/request")
 async def create_data_request(
     body: DataRequestCreate,
     token=Depends(get_current_token),
@@ -69,7 +69,7 @@ async def create_data_request(
     return result
 
 
-@router.post("/response", response_model=dict)
+@router.post("/response")
 async def receive_data_from_hip(
     body: HIPDataResponse,
     token=Depends(get_current_token),
@@ -122,14 +122,16 @@ async def get_request_status_endpoint(
 
 
 # Legacy endpoints (kept for backward compatibility)
-@router.post("/health-info", response_model=SendHealthInfoResponse)
+# These return model_construct-built responses without a response_model:
+# the service output is trusted, so the second Pydantic pass is skipped.
+@router.post("/health-info")
 async def send_health_info_endpoint(
     body: SendHealthInfoRequest,
     token=Depends(get_current_token),
     headers=Depends(require_gateway_headers),
     db: AsyncSession = Depends(get_db)
 ):
-    return SendHealthInfoResponse(
+    return SendHealthInfoResponse.model_construct(
         **(await send_health_info(
             body.txnId, body.patientId, body.hipId,
             body.careContextId, body.healthInfo.dict(),
@@ -138,7 +140,7 @@ async def send_health_info_endpoint(
     )
 
 
-@router.post("/request-info", response_model=RequestHealthInfoResponse)
+@router.post("/request-info")
 async def request_health_info_endpoint(
     body: RequestHealthInfoRequest,
     token=Depends(get_current_token),
@@ -163,15 +165,15 @@ async def request_health_info_endpoint(
             detail=result["error"]
         )
 
-    return RequestHealthInfoResponse(**result)
+    return RequestHealthInfoResponse.model_construct(**result)
 
-@router.post("/notify", response_model=DataFlowNotifyResponse)
+@router.post("/notify")
 async def data_flow_notify_endpoint(
     body: DataFlowNotifyRequest,
     token=Depends(get_current_token),
     headers=Depends(require_gateway_headers),
     db: AsyncSession = Depends(get_db)
 ):
-    return DataFlowNotifyResponse(
+    return DataFlowNotifyResponse.model_construct(
         **(await notify_data_flow(body.txnId, body.status, body.hipId, db))
     )
\ No newline at end of file
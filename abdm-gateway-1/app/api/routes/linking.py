@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import msgspec
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.deps.headers import require_gateway_headers
 from app.deps.auth import get_current_token
+from app.api.msgspec_route import decode_body, msgspec_response
 from app.api.schemas import (
     LinkTokenRequest, LinkTokenResponse,
     LinkCareContextRequest, LinkCareContextResponse,
@@ -18,31 +20,35 @@ from app.database.connection import get_db
 
 router = APIRouter(prefix="/link", tags=["linking"])
 
-@router.post("/token/generate", response_model=LinkTokenResponse)
+@router.post("/token/generate")
 async def generate_token(
-    body: LinkTokenRequest,
+    request: Request,
     token=Depends(get_current_token),
     headers=Depends(require_gateway_headers),
     db: AsyncSession = Depends(get_db)
 ):
-    return LinkTokenResponse(**(await generate_link_token(body.patientId, body.hipId, db)))
+    body = await decode_body(request, LinkTokenRequest)
+    return msgspec_response(LinkTokenResponse(**(await generate_link_token(body.patientId, body.hipId, db))))
 
-@router.post("/carecontext", response_model=LinkCareContextResponse)
+@router.post("/carecontext")
 async def link_carecontext(
-    body: LinkCareContextRequest,
+    request: Request,
     token=Depends(get_current_token),
     headers=Depends(require_gateway_headers),
     db: AsyncSession = Depends(get_db)
 ):
-    return LinkCareContextResponse(**(await link_care_contexts(body.patientId, [cc.dict() for cc in body.careContexts], db)))
+    body = await decode_body(request, LinkCareContextRequest)
+    care_contexts = [msgspec.to_builtins(cc) for cc in body.careContexts]
+    return msgspec_response(LinkCareContextResponse(**(await link_care_contexts(body.patientId, care_contexts, db))))
 
-@router.post("/discover", response_model=DiscoverPatientResponse)
+@router.post("/discover")
 async def discover(
-    body: DiscoverPatientRequest,
+    request: Request,
     token=Depends(get_current_token),
     headers=Depends(require_gateway_headers),
     db: AsyncSession = Depends(get_db)
 ):
+    body = await decode_body(request, DiscoverPatientRequest)
     result = await discover_patient(
         mobile=body.mobile,
         name=body.name,
@@ -55,31 +61,34 @@ async def discover(
         raise HTTPException(status_code=404, detail="Patient not found or could not be registered.")
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
-    return DiscoverPatientResponse(**result)
+    return msgspec_response(DiscoverPatientResponse(**result))
 
-@router.post("/init", response_model=LinkInitResponse)
+@router.post("/init")
 async def init(
-    body: LinkInitRequest,
+    request: Request,
     token=Depends(get_current_token),
     headers=Depends(require_gateway_headers),
     db: AsyncSession = Depends(get_db)
 ):
-    return LinkInitResponse(**(await init_link(body.patientId, body.txnId, body.hipId, db)))
+    body = await decode_body(request, LinkInitRequest)
+    return msgspec_response(LinkInitResponse(**(await init_link(body.patientId, body.txnId, body.hipId, db))))
 
-@router.post("/confirm", response_model=LinkConfirmResponse)
+@router.post("/confirm")
 async def confirm(
-    body: LinkConfirmRequest,
+    request: Request,
     token=Depends(get_current_token),
     headers=Depends(require_gateway_headers),
     db: AsyncSession = Depends(get_db)
 ):
-    return LinkConfirmResponse(**(await confirm_link(body.patientId, body.txnId, body.otp, body.hipId, db)))
+    body = await decode_body(request, LinkConfirmRequest)
+    return msgspec_response(LinkConfirmResponse(**(await confirm_link(body.patientId, body.txnId, body.otp, body.hipId, db))))
 
 @router.post("/notify")
 async def notify(
-    body: LinkNotifyRequest,
+    request: Request,
     token=Depends(get_current_token),
     headers=Depends(require_gateway_headers),
     db: AsyncSession = Depends(get_db)
 ):
-    return await notify_link(body.txnId, body.status, db)
+    body = await decode_body(request, LinkNotifyRequest)
+    return msgspec_response(await notify_link(body.txnId, body.status, db))
@@ -1,62 +1,65 @@
 from typing import List, Optional
-from pydantic import BaseModel
+import msgspec
 
-class LinkTokenRequest(BaseModel):
+class LinkTokenRequest(msgspec.Struct):
     patientId: str
     hipId: str
 
-class LinkTokenResponse(BaseModel):
+class LinkTokenResponse(msgspec.Struct):
     token: str
-    expiresIn: int = 300
     txnId: str
+    expiresIn: int = 300
 
-class CareContext(BaseModel):
+class CareContext(msgspec.Struct):
     id: str
     referenceNumber: str
-    hipId: str = None  # Hospital ID (optional but recommended)
+    hipId: Optional[str] = None  # Hospital ID (optional but recommended)
 
-class LinkCareContextRequest(BaseModel):
+class LinkCareContextRequest(msgspec.Struct):
     patientId: str
     careContexts: List[CareContext]
 
-class LinkCareContextResponse(BaseModel):
+class LinkCareContextResponse(msgspec.Struct):
     status: str = "PENDING"
+    count: int = 0
 
-class DiscoverPatientRequest(BaseModel):
+class DiscoverPatientRequest(msgspec.Struct):
     mobile: str
-    name: str = None
-    gender: str = None  # Male, Female, Other
-    dateOfBirth: str = None  # ISO date string
-    aadhaar: str = None
+    name: Optional[str] = None
+    gender: Optional[str] = None  # Male, Female, Other
+    dateOfBirth: Optional[str] = None  # ISO date string
+    aadhaar: Optional[str] = None
 
-class DiscoverPatientResponse(BaseModel):
+class DiscoverPatientResponse(msgspec.Struct):
     patientId: str
-    abhaId: str = None
+    abhaId: Optional[str] = None
     status: str = "FOUND"
-    gender: str = None
-    dateOfBirth: str = None
-    abhaAddress: str = None
+    gender: Optional[str] = None
+    dateOfBirth: Optional[str] = None
+    abhaAddress: Optional[str] = None
 
-class LinkInitRequest(BaseModel):
+class LinkInitRequest(msgspec.Struct):
     patientId: str
     txnId: str
     hipId: str = "HOSPITAL-1"  # Default to HOSPITAL-1, but should be provided
 
-class LinkInitResponse(BaseModel):
-    status: str = "LINKED"
+class LinkInitResponse(msgspec.Struct):
     txnId: str
-    token: str = None
+    status: str = "LINKED"
+    token: Optional[str] = None
+    message: Optional[str] = None
 
-class LinkConfirmRequest(BaseModel):
+class LinkConfirmRequest(msgspec.Struct):
     patientId: str
     txnId: str
     otp: str
     hipId: str = "HOSPITAL-1"  # Default to HOSPITAL-1, but should be provided
 
-class LinkConfirmResponse(BaseModel):
-    status: str = "CONFIRMED"
+class LinkConfirmResponse(msgspec.Struct):
     txnId: str
+    status: str = "CONFIRMED"
+    message: Optional[str] = None
 
-class LinkNotifyRequest(BaseModel):
+class LinkNotifyRequest(msgspec.Struct):
     txnId: str
-    status: str
\ No newline at end of file
+    status: str
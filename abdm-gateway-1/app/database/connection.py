@@ -4,8 +4,22 @@ from app.core.config import get_settings
 
 settings = get_settings()
 
+# Driver-level batching/caching options. The request chains several small
+# writes per call (patient, consent, transfer), so on PostgreSQL drivers we
+# enable statement caching / values batching to collapse them into fewer
+# network round trips. SQLite (the default) needs none of this. SQL echo is
+# only useful locally and costs I/O per statement, so it follows app_env.
+engine_kwargs = {"echo": settings.app_env == "local"}
+if settings.database_url.startswith("postgresql+asyncpg"):
+    engine_kwargs["connect_args"] = {
+        "statement_cache_size": 1024,
+        "server_settings": {"jit": "off"},
+    }
+elif settings.database_url.startswith("postgresql+psycopg"):
+    engine_kwargs["executemany_mode"] = "values_plus_batch"
+
 # Create the database engine
-engine = create_async_engine(settings.database_url, echo=True)
+engine = create_async_engine(settings.database_url, **engine_kwargs)
 
 # Create a session factory
 async_session = sessionmaker(
@@ -15,4 +29,4 @@ async_session = sessionmaker(
 # Dependency to get the database session
 async def get_db():
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
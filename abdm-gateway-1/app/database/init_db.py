@@ -6,8 +6,8 @@ import uuid
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from app.database.connection import engine, async_session
 from app.database.models import (
     Base, Client, Bridge, BridgeService, Patient,
@@ -23,27 +23,24 @@ async def init_db():
 
 
 async def seed_clients():
-    """Add client credentials to the database."""
+    """Add client credentials to the database (idempotent)."""
     async with async_session() as session:
-        # Check if data already exists
-        result = await session.execute(select(Client))
-        existing = result.scalars().all()
-        
-        if existing:
-            print("Clients already exist in the database.")
-            return
-        
-        # Add client credentials for hospital authentication
+        # Single race-free bulk INSERT; the unique constraint on client_id
+        # makes reruns a no-op, so no existence check is needed.
         client_credentials = [
-            Client(client_id="client-001", client_secret="secret-001"),
-            Client(client_id="client-002", client_secret="secret-002"),
-            Client(client_id="hospital-abdm", client_secret="hospital-secret-123"),
-            Client(client_id="test-client", client_secret="test-secret"),
+            {"client_id": "client-001", "client_secret": "secret-001"},
+            {"client_id": "client-002", "client_secret": "secret-002"},
+            {"client_id": "hospital-abdm", "client_secret": "hospital-secret-123"},
+            {"client_id": "test-client", "client_secret": "test-secret"},
         ]
-        
-        session.add_all(client_credentials)
+        stmt = (
+            sqlite_insert(Client)
+            .values(client_credentials)
+            .on_conflict_do_nothing(index_elements=["client_id"])
+        )
+        result = await session.execute(stmt)
         await session.commit()
-        print(f"✓ Successfully seeded {len(client_credentials)} client credentials.")
+        print(f"✓ Client credentials seeded ({result.rowcount} new rows).")
 
 
 # =============================================================================
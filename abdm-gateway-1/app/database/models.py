@@ -9,7 +9,7 @@ class Client(Base):
     __tablename__ = "clients"
 
     id = Column(Integer, primary_key=True, index=True)
-    client_id = Column(String, unique=True, nullable=False)
+    client_id = Column(String, unique=True, nullable=False, index=True)
     client_secret = Column(String, nullable=False)
 
 
@@ -42,7 +42,7 @@ class Bridge(Base):
     __tablename__ = "bridges"
 
     id = Column(Integer, primary_key=True, index=True)
-    bridge_id = Column(String, unique=True, nullable=False)
+    bridge_id = Column(String, unique=True, nullable=False, index=True)
     entity_type = Column(String, nullable=False)  # e.g., "HIP", "HIU"
     name = Column(String, nullable=False)
     webhook_url = Column(String, nullable=True)
@@ -54,7 +54,7 @@ class BridgeService(Base):
     __tablename__ = "bridge_services"
 
     id = Column(Integer, primary_key=True, index=True)
-    service_id = Column(String, unique=True, nullable=False)
+    service_id = Column(String, unique=True, nullable=False, index=True)
     bridge_id = Column(String, nullable=False)
     service_name = Column(String, nullable=False)
     service_type = Column(String, nullable=False)  # e.g., "LAB", "PHARMACY"
@@ -66,7 +66,7 @@ class LinkingRequest(Base):
     __tablename__ = "linking_requests"
 
     id = Column(Integer, primary_key=True, index=True)
-    txn_id = Column(String, unique=True, nullable=False)
+    txn_id = Column(String, unique=True, nullable=False, index=True)
     patient_abha_id = Column(String, ForeignKey("patients.abha_id"), nullable=False, index=True)
     hip_id = Column(String, nullable=False)
     mobile = Column(String, nullable=True)
@@ -85,7 +85,7 @@ class LinkedCareContext(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     patient_abha_id = Column(String, ForeignKey("patients.abha_id"), nullable=False, index=True)
-    care_context_id = Column(String, unique=True, nullable=False)
+    care_context_id = Column(String, unique=True, nullable=False, index=True)
     reference_number = Column(String, nullable=False)
     hip_id = Column(String, nullable=False)
     
@@ -99,7 +99,7 @@ class ConsentRequest(Base):
     __tablename__ = "consent_requests"
 
     id = Column(Integer, primary_key=True, index=True)
-    consent_request_id = Column(String, unique=True, nullable=False)
+    consent_request_id = Column(String, unique=True, nullable=False, index=True)
     patient_abha_id = Column(String, ForeignKey("patients.abha_id"), nullable=False, index=True)
     hip_id = Column(String, nullable=False)
     purpose = Column(JSON, nullable=False)
@@ -116,7 +116,7 @@ class DataTransfer(Base):
     __tablename__ = "data_transfers"
 
     id = Column(Integer, primary_key=True, index=True)
-    transfer_id = Column(String, unique=True, nullable=False)
+    transfer_id = Column(String, unique=True, nullable=False, index=True)
     consent_request_id = Column(String, nullable=False)
     patient_abha_id = Column(String, ForeignKey("patients.abha_id"), nullable=False, index=True)
     from_entity = Column(String, nullable=False)  # HIP
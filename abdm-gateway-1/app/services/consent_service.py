@@ -1,28 +1,61 @@
 import uuid
+from time import monotonic
 from typing import Dict, Optional
+from sqlalchemy import lambda_stmt, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.database.models import ConsentRequest, Patient
 
 
+def _consent_by_id(consent_id: str):
+    """Lambda-cached SELECT for the repeated consent_request_id lookup; only
+    the bind value changes between calls, so compilation is amortized."""
+    return lambda_stmt(lambda: select(ConsentRequest).where(ConsentRequest.consent_request_id == consent_id))
+
+
+def _consent_columns_by_id(consent_id: str):
+    """Column-subset variant for the read-only getters: fetching just the
+    two needed columns skips ORM hydration and identity-map bookkeeping."""
+    return lambda_stmt(
+        lambda: select(ConsentRequest.status, ConsentRequest.created_at).where(
+            ConsentRequest.consent_request_id == consent_id
+        )
+    )
+
+# In-process TTL cache for the polled consent reads. Writer paths call
+# _invalidate_consent_cache so a status change is visible immediately;
+# the TTL only bounds staleness across processes.
+_CACHE_TTL = 2.0
+_consent_cache: dict = {}
+
+
+def _invalidate_consent_cache(consent_id: str) -> None:
+    """Drop cached read results for a consent after a write."""
+    _consent_cache.pop(("status", consent_id), None)
+    _consent_cache.pop(("fetch", consent_id), None)
+
+
 async def _ensure_patient(db: AsyncSession, patient_abha_id: str) -> Patient:
     """Fetch or auto-register a patient required for consent FK."""
-    result = await db.execute(select(Patient).where(Patient.abha_id == patient_abha_id))
-    patient = result.scalar_one_or_none()
-    if patient:
-        return patient
-
-    patient = Patient(abha_id=patient_abha_id, name=f"Patient {patient_abha_id}")
-    db.add(patient)
+    # Single round-trip UPSERT: the no-op conflict update keeps RETURNING
+    # populated when the patient already exists.
+    stmt = (
+        sqlite_insert(Patient)
+        .values(abha_id=patient_abha_id, name=f"Patient {patient_abha_id}")
+        .on_conflict_do_update(index_elements=["abha_id"], set_={"abha_id": patient_abha_id})
+        .returning(Patient)
+    )
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    patient = result.scalar_one()
     await db.commit()
-    await db.refresh(patient)
     return patient
 
 
 async def init_consent(patient_abha_id: str, hip_id: str, purpose: Dict, db: AsyncSession) -> Dict:
     """Initialize and auto-approve a consent request (demo flow)."""
     await _ensure_patient(db, patient_abha_id)
-    consent_id = str(uuid.uuid4())
+    consent_id = uuid.uuid4().hex
 
     new_consent = ConsentRequest(
         consent_request_id=consent_id,
@@ -33,53 +66,61 @@ async def init_consent(patient_abha_id: str, hip_id: str, purpose: Dict, db: Asy
     )
     db.add(new_consent)
     await db.commit()
-    await db.refresh(new_consent)
-    
+
     return {"consentRequestId": consent_id, "status": new_consent.status}
 
 
 async def get_consent_status(consent_id: str, db: AsyncSession) -> Optional[Dict]:
     """Get the status of a consent request."""
-    result = await db.execute(
-        select(ConsentRequest).where(ConsentRequest.consent_request_id == consent_id)
-    )
-    consent = result.scalar()
-    
-    if consent:
-        return {
+    cached = _consent_cache.get(("status", consent_id))
+    if cached and cached[0] > monotonic():
+        return cached[1]
+
+    row = (await db.execute(_consent_columns_by_id(consent_id))).first()
+
+    if row:
+        payload = {
             "consentRequestId": consent_id,
-            "status": consent.status,
-            "createdAt": consent.created_at.isoformat() if consent.created_at else None
+            "status": row.status,
+            "createdAt": row.created_at.isoformat() if row.created_at else None
         }
+        _consent_cache[("status", consent_id)] = (monotonic() + _CACHE_TTL, payload)
+        return payload
     return None
 
 
 async def fetch_consent(consent_id: str, db: AsyncSession) -> Optional[Dict]:
     """Fetch a consent artefact."""
-    result = await db.execute(
-        select(ConsentRequest).where(ConsentRequest.consent_request_id == consent_id)
-    )
-    consent = result.scalar()
-    
-    if consent:
-        return {
+    cached = _consent_cache.get(("fetch", consent_id))
+    if cached and cached[0] > monotonic():
+        return cached[1]
+
+    row = (await db.execute(_consent_columns_by_id(consent_id))).first()
+
+    if row:
+        payload = {
             "consentRequestId": consent_id,
-            "status": consent.status,
+            "status": row.status,
             "consentArtefact": {"data": "encrypted-consent-artefact"}
         }
+        _consent_cache[("fetch", consent_id)] = (monotonic() + _CACHE_TTL, payload)
+        return payload
     return None
 
 
 async def notify_consent(consent_id: str, status: str, db: AsyncSession) -> Dict:
     """Update consent status via notification."""
+    # Atomic UPDATE ... RETURNING: one round trip instead of read-then-write,
+    # and RETURNING doubles as the existence check.
     result = await db.execute(
-        select(ConsentRequest).where(ConsentRequest.consent_request_id == consent_id)
+        update(ConsentRequest)
+        .where(ConsentRequest.consent_request_id == consent_id)
+        .values(status=status)
+        .returning(ConsentRequest.consent_request_id)
     )
-    consent = result.scalar()
-    
-    if consent:
-        consent.status = status
-        await db.commit()
-        return {"consentRequestId": consent_id, "status": status}
-    
-    return {"consentRequestId": consent_id, "status": "NOT_FOUND"}
+    if result.scalar() is None:
+        return {"consentRequestId": consent_id, "status": "NOT_FOUND"}
+
+    await db.commit()
+    _invalidate_consent_cache(consent_id)
+    return {"consentRequestId": consent_id, "status": status}
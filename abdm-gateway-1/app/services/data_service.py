@@ -1,25 +1,56 @@
+import asyncio
 import uuid
+from time import monotonic
 from typing import Dict, Optional, List
 from datetime import datetime, timedelta
+from sqlalchemy import lambda_stmt, literal, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.database.connection import async_session
 from app.database.models import DataTransfer, ConsentRequest, Patient
 from app.utils.encryption import encryptor
+from app.services.consent_service import _consent_by_id, _invalidate_consent_cache
 from app.services.task_processor import task_processor
 from loguru import logger
 
 
+def _transfer_by_id(transfer_id: str):
+    """Lambda-cached SELECT for the repeated transfer_id lookup; only the
+    bind value changes between calls, so compilation is amortized."""
+    return lambda_stmt(lambda: select(DataTransfer).where(DataTransfer.transfer_id == transfer_id))
+
+# In-process TTL cache for the polled transfer-status reads. Writer paths
+# pop the key so status flips are visible immediately; the TTL only bounds
+# staleness across processes.
+_CACHE_TTL = 2.0
+_status_cache: dict = {}
+
+
+async def _with_own_session(fn, *args):
+    """Run a service helper on a session of its own.
+
+    An AsyncSession is bound to one connection and must not be shared by
+    concurrent awaitables, so helpers fanned out via asyncio.gather each get
+    a fresh session from the factory.
+    """
+    async with async_session() as session:
+        return await fn(session, *args)
+
+
 async def _ensure_patient(db: AsyncSession, patient_abha_id: str) -> Patient:
     """Guarantee a patient exists to satisfy FK constraints."""
-    result = await db.execute(select(Patient).where(Patient.abha_id == patient_abha_id))
-    patient = result.scalar_one_or_none()
-    if patient:
-        return patient
-
-    patient = Patient(abha_id=patient_abha_id, name=f"Patient {patient_abha_id}")
-    db.add(patient)
+    # Single round-trip UPSERT: the no-op conflict update keeps RETURNING
+    # populated when the patient already exists.
+    stmt = (
+        sqlite_insert(Patient)
+        .values(abha_id=patient_abha_id, name=f"Patient {patient_abha_id}")
+        .on_conflict_do_update(index_elements=["abha_id"], set_={"abha_id": patient_abha_id})
+        .returning(Patient)
+    )
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    patient = result.scalar_one()
     await db.commit()
-    await db.refresh(patient)
     return patient
 
 
@@ -31,19 +62,31 @@ async def _ensure_consent_approved(
 ) -> str:
     """Ensure there is an approved consent; auto-approve if missing."""
     if consent_id:
-        consent_result = await db.execute(
-            select(ConsentRequest).where(ConsentRequest.consent_request_id == consent_id)
-        )
+        # Common case: the consent is already approved. A single-row boolean
+        # probe answers that without hydrating the ORM object.
+        approved = (
+            await db.execute(
+                select(literal(True))
+                .select_from(ConsentRequest)
+                .where(
+                    ConsentRequest.consent_request_id == consent_id,
+                    ConsentRequest.status == "APPROVED",
+                )
+            )
+        ).scalar()
+        if approved:
+            return consent_id
+
+        consent_result = await db.execute(_consent_by_id(consent_id))
         consent = consent_result.scalar_one_or_none()
         if consent:
-            if consent.status != "APPROVED":
-                consent.status = "APPROVED"
-                await db.commit()
-                await db.refresh(consent)
+            consent.status = "APPROVED"
+            await db.commit()
+            _invalidate_consent_cache(consent_id)
             return consent.consent_request_id
 
     # Create a fresh auto-approved consent when none is provided/found
-    new_consent_id = consent_id or f"consent-{uuid.uuid4()}"
+    new_consent_id = consent_id or f"consent-{uuid.uuid4().hex}"
     consent = ConsentRequest(
         consent_request_id=new_consent_id,
         patient_abha_id=patient_abha_id,
@@ -53,8 +96,7 @@ async def _ensure_consent_approved(
     )
     db.add(consent)
     await db.commit()
-    await db.refresh(consent)
-    return consent.consent_request_id
+    return new_consent_id
 
 
 async def request_health_info(
@@ -67,28 +109,21 @@ async def request_health_info(
     db: AsyncSession,
 ) -> Dict:
     """HIU requests health information from HIP via Gateway."""
-    await _ensure_patient(db, patient_abha_id)
-    approved_consent_id = await _ensure_consent_approved(db, consent_id, patient_abha_id, hip_id)
-
-    request_id = f"req-{uuid.uuid4()}"
-
-    new_transfer = DataTransfer(
-        transfer_id=request_id,
-        consent_request_id=approved_consent_id,
-        patient_abha_id=patient_abha_id,
-        from_entity=hip_id,
-        to_entity=hiu_id or "unknown-hiu",
-        status="REQUESTED",
-        data_count=len(data_types or []),
-        next_retry_at=datetime.utcnow(),
-        expires_at=datetime.utcnow() + timedelta(hours=24),
+    # The patient upsert and the consent check are independent (the consent
+    # row only needs the patient_abha_id string, not the Patient object), so
+    # run them concurrently, each on its own session.
+    _, approved_consent_id = await asyncio.gather(
+        _with_own_session(_ensure_patient, patient_abha_id),
+        _with_own_session(_ensure_consent_approved, consent_id, patient_abha_id, hip_id),
     )
-    db.add(new_transfer)
-    await db.commit()
-    await db.refresh(new_transfer)
+
+    request_id = f"req-{uuid.uuid4().hex}"
 
     logger.info(f"Created data request {request_id} from HIU {hiu_id} to HIP {hip_id}")
 
+    # The webhook only needs locally generated IDs (it reads the Bridge row,
+    # never the transfer), so fire it first and insert the transfer once with
+    # its final status — a single commit instead of two straddling the call.
     webhook_sent = await task_processor.send_hip_data_request(
         db=db,
         transfer_id=request_id,
@@ -100,12 +135,25 @@ async def request_health_info(
         data_types=data_types,
     )
 
-    if webhook_sent:
-        new_transfer.status = "FORWARDED"
-    else:
-        new_transfer.status = "FAILED"
+    if not webhook_sent:
         logger.error(f"Failed to forward request {request_id} to HIP {hip_id}")
 
+    # One clock read per request; both timestamps derive from it. Kept naive
+    # UTC to match the model column defaults and the comparisons in
+    # task_processor (mixing aware and naive datetimes raises TypeError).
+    now = datetime.utcnow()
+    new_transfer = DataTransfer(
+        transfer_id=request_id,
+        consent_request_id=approved_consent_id,
+        patient_abha_id=patient_abha_id,
+        from_entity=hip_id,
+        to_entity=hiu_id or "unknown-hiu",
+        status="FORWARDED" if webhook_sent else "FAILED",
+        data_count=len(data_types or []),
+        next_retry_at=now,
+        expires_at=now + timedelta(hours=24),
+    )
+    db.add(new_transfer)
     await db.commit()
 
     return {
@@ -135,8 +183,7 @@ async def receive_health_data_from_hip(
         Status of data receipt
     """
     # Find transfer request
-    stmt = select(DataTransfer).where(DataTransfer.transfer_id == request_id)
-    result = await db.execute(stmt)
+    result = await db.execute(_transfer_by_id(request_id))
     transfer = result.scalar_one_or_none()
     
     if not transfer:
@@ -151,9 +198,10 @@ async def receive_health_data_from_hip(
     transfer.encrypted_data = encrypted_data
     transfer.status = "READY"
     transfer.next_retry_at = datetime.utcnow()  # Trigger immediate webhook delivery
-    
+
     await db.commit()
-    
+    _status_cache.pop(request_id, None)
+
     logger.info(f"Received health data for request {request_id}, ready for delivery")
     
     # Trigger immediate webhook delivery (will be picked up by background processor)
@@ -178,7 +226,7 @@ async def send_health_info(
     Legacy method - Record sent health information.
     Kept for backward compatibility.
     """
-    transfer_id = str(uuid.uuid4())
+    transfer_id = uuid.uuid4().hex
     
     new_transfer = DataTransfer(
         transfer_id=transfer_id,
@@ -206,11 +254,13 @@ async def get_data_request_status(request_id: str, db: AsyncSession) -> Optional
     Returns:
         Detailed status information
     """
-    result = await db.execute(
-        select(DataTransfer).where(DataTransfer.transfer_id == request_id)
-    )
+    cached = _status_cache.get(request_id)
+    if cached and cached[0] > monotonic():
+        return cached[1]
+
+    result = await db.execute(_transfer_by_id(request_id))
     transfer = result.scalar()
-    
+
     if transfer:
         status_info = {
             "requestId": request_id,
@@ -238,9 +288,10 @@ async def get_data_request_status(request_id: str, db: AsyncSession) -> Optional
             status_info["dataStored"] = True
         else:
             status_info["dataStored"] = False
-        
+
+        _status_cache[request_id] = (monotonic() + _CACHE_TTL, status_info)
         return status_info
-    
+
     return None
 
 
@@ -249,14 +300,17 @@ async def notify_data_flow(txn_id: str, status: str, hip_id: str, db: AsyncSessi
     Notify about data flow status change.
     Legacy method for backward compatibility.
     """
+    # Atomic UPDATE ... RETURNING: one round trip instead of read-then-write,
+    # and RETURNING doubles as the existence check.
     result = await db.execute(
-        select(DataTransfer).where(DataTransfer.transfer_id == txn_id)
+        update(DataTransfer)
+        .where(DataTransfer.transfer_id == txn_id)
+        .values(status=status)
+        .returning(DataTransfer.transfer_id)
     )
-    transfer = result.scalar()
-    
-    if transfer:
-        transfer.status = status
-        await db.commit()
-        return {"status": status, "txnId": txn_id}
-    
-    return {"status": "NOT_FOUND", "txnId": txn_id}
+    if result.scalar() is None:
+        return {"status": "NOT_FOUND", "txnId": txn_id}
+
+    await db.commit()
+    _status_cache.pop(txn_id, None)
+    return {"status": status, "txnId": txn_id}
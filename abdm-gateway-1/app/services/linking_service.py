@@ -1,10 +1,58 @@
+import asyncio
 import uuid
+from datetime import datetime
+from functools import lru_cache
+from time import monotonic
 from typing import Dict, List, Optional
+from sqlalchemy import lambda_stmt, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from loguru import logger
 from app.database.models import LinkingRequest, LinkedCareContext, Patient
 
 
+def _linking_request_by_txn(txn_id: str):
+    """Lambda-cached SELECT for the repeated txn_id lookup; only the bind
+    value changes between calls, so compilation is amortized."""
+    return lambda_stmt(lambda: select(LinkingRequest).where(LinkingRequest.txn_id == txn_id))
+
+
+def _patient_by_mobile(mobile: str):
+    """Lambda-cached SELECT for discovery's patient-by-mobile lookup."""
+    return lambda_stmt(lambda: select(Patient).where(Patient.mobile == mobile))
+
+
+@lru_cache(maxsize=4096)
+def _parse_dob(value: str) -> Optional[datetime]:
+    """Parse an ISO date-of-birth string, memoized since the same DOB is
+    re-sent on every discovery/link call for a patient."""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+# In-process TTL cache for polled discovery reads. Entries are keyed on the
+# full demographic tuple, so an identical repeat poll short-circuits the DB
+# while a call carrying new demographics still goes through the update path.
+_CACHE_TTL = 2.0
+_discover_cache: dict = {}
+
+# Per-mobile creation locks. SQLite has no advisory locks, so concurrent
+# first-time discoveries for the same mobile are serialized in-process and
+# re-checked under the lock; only one contender inserts, the rest see the
+# existing row instead of failing on the unique constraint and rolling back.
+# (On PostgreSQL the equivalent is pg_advisory_xact_lock(hashtext(mobile)).)
+_create_locks: dict = {}
+
+
+def _mobile_lock(mobile: str) -> asyncio.Lock:
+    lock = _create_locks.get(mobile)
+    if lock is None:
+        lock = _create_locks.setdefault(mobile, asyncio.Lock())
+    return lock
+
+
 async def _ensure_patient(
     db: AsyncSession,
     patient_abha_id: str,
@@ -15,59 +63,46 @@ async def _ensure_patient(
     aadhaar: Optional[str] = None,
 ) -> Patient:
     """Fetch or auto-register a patient by ABHA ID on first sight."""
-    print(f"[DEBUG][gateway] _ensure_patient received gender: {gender}, date_of_birth: {date_of_birth}")
-    result = await db.execute(select(Patient).where(Patient.abha_id == patient_abha_id))
-    patient = result.scalar_one_or_none()
-
-    if patient:
-        # Update existing patient with new info if provided
-        updated = False
-        if name and patient.name != name:
-            patient.name = name
-            updated = True
-        if mobile and patient.mobile != mobile:
-            patient.mobile = mobile
-            updated = True
-        if gender and (not patient.gender or patient.gender != gender):
-            patient.gender = gender
-            updated = True
-        if date_of_birth:
-            from datetime import datetime
-            try:
-                dob_val = date_of_birth
-                if isinstance(date_of_birth, str):
-                    dob_val = datetime.fromisoformat(date_of_birth.replace('Z', '+00:00'))
-                if not patient.date_of_birth or patient.date_of_birth != dob_val:
-                    patient.date_of_birth = dob_val
-                    updated = True
-            except:
-                pass
-        if updated:
-            await db.commit()
-            await db.refresh(patient)
-            print(f"[DEBUG][gateway] Updated gender: {patient.gender}, date_of_birth: {patient.date_of_birth}")
-        return patient
-
-    # Create new patient with all provided data
-    patient = Patient(
-        abha_id=patient_abha_id,
-        name=name or f"Patient {patient_abha_id}",
-        mobile=mobile,
-        gender=gender,
-        date_of_birth=date_of_birth,
-        abha_address=f"{(name or 'patient').lower().replace(' ', '.')}@sbx" if name else None,
+    logger.debug("_ensure_patient received gender={}, date_of_birth={}", gender, date_of_birth)
+    dob_val = _parse_dob(date_of_birth) if isinstance(date_of_birth, str) else date_of_birth
+
+    # Single round-trip UPSERT: insert on first sight, otherwise update only
+    # the fields the caller actually provided. The no-op abha_id assignment
+    # keeps RETURNING populated when nothing new was supplied.
+    update_set = {"abha_id": patient_abha_id}
+    if name:
+        update_set["name"] = name
+    if mobile:
+        update_set["mobile"] = mobile
+    if gender:
+        update_set["gender"] = gender
+    if dob_val is not None:
+        update_set["date_of_birth"] = dob_val
+
+    stmt = (
+        sqlite_insert(Patient)
+        .values(
+            abha_id=patient_abha_id,
+            name=name or f"Patient {patient_abha_id}",
+            mobile=mobile,
+            gender=gender,
+            date_of_birth=dob_val,
+            abha_address=f"{(name or 'patient').lower().replace(' ', '.')}@sbx" if name else None,
+        )
+        .on_conflict_do_update(index_elements=["abha_id"], set_=update_set)
+        .returning(Patient)
     )
-    db.add(patient)
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    patient = result.scalar_one()
     await db.commit()
-    await db.refresh(patient)
-    print(f"[DEBUG][gateway] Created gender: {patient.gender}, date_of_birth: {patient.date_of_birth}")
+    logger.debug("Upserted patient {}: gender={}, date_of_birth={}", patient_abha_id, patient.gender, patient.date_of_birth)
     return patient
 
 
 async def generate_link_token(patient_abha_id: str, hip_id: str, db: AsyncSession) -> Dict:
     """Generate a link token for a patient (auto-register if first seen)."""
-    token = str(uuid.uuid4())
-    txn_id = str(uuid.uuid4())
+    token = uuid.uuid4().hex
+    txn_id = uuid.uuid4().hex
 
     await _ensure_patient(db, patient_abha_id)
     
@@ -88,24 +123,31 @@ async def generate_link_token(patient_abha_id: str, hip_id: str, db: AsyncSessio
 async def link_care_contexts(patient_abha_id: str, care_contexts: List[Dict], db: AsyncSession) -> Dict:
     """Link care contexts to a patient (auto-register if first seen)."""
     await _ensure_patient(db, patient_abha_id)
-    created_count = 0
-    
-    for cc in care_contexts:
-        existing = await db.execute(
-            select(LinkedCareContext).where(
-                LinkedCareContext.care_context_id == cc.get("id")
-            )
-        )
-        if not existing.scalar():
-            care_context = LinkedCareContext(
-                patient_abha_id=patient_abha_id,
-                care_context_id=cc.get("id"),
-                reference_number=cc.get("referenceNumber"),
-                hip_id=cc.get("hipId", "unknown")
-            )
-            db.add(care_context)
-            created_count += 1
-    
+
+    if not care_contexts:
+        return {"status": "LINKED", "count": 0}
+
+    # One bulk INSERT for all contexts; the unique constraint on
+    # care_context_id plus ON CONFLICT DO NOTHING replaces the per-row
+    # existence check, turning N+1 round trips into 1.
+    rows = [
+        {
+            "patient_abha_id": patient_abha_id,
+            "care_context_id": cc.get("id"),
+            "reference_number": cc.get("referenceNumber"),
+            "hip_id": cc.get("hipId") or "unknown",
+        }
+        for cc in care_contexts
+    ]
+    stmt = (
+        sqlite_insert(LinkedCareContext)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["care_context_id"])
+        .returning(LinkedCareContext.care_context_id)
+    )
+    result = await db.execute(stmt)
+    created_count = len(result.scalars().all())
+
     await db.commit()
     return {"status": "LINKED", "count": created_count}
 
@@ -119,10 +161,15 @@ async def discover_patient(
     db: AsyncSession = None,
 ) -> Dict:
     """Discover a patient by mobile and name. Auto-register if not found."""
+    cache_key = (mobile, name, gender, date_of_birth, aadhaar)
+    cached = _discover_cache.get(cache_key)
+    if cached and cached[0] > monotonic():
+        return cached[1]
+
     try:
-        print(f"[DEBUG][gateway] discover_patient received gender: {gender}, date_of_birth: {date_of_birth}")
+        logger.debug("discover_patient received gender={}, date_of_birth={}", gender, date_of_birth)
         # First check if patient exists by mobile (most reliable identifier)
-        result = await db.execute(select(Patient).where(Patient.mobile == mobile))
+        result = await db.execute(_patient_by_mobile(mobile))
         patient = result.scalar_one_or_none()
 
         if patient:
@@ -132,25 +179,18 @@ async def discover_patient(
                 patient.gender = gender
                 updated = True
             if date_of_birth and not patient.date_of_birth:
-                # Parse date_of_birth if it's a string
-                try:
-                    from datetime import datetime
-                    if isinstance(date_of_birth, str):
-                        patient.date_of_birth = datetime.fromisoformat(date_of_birth.replace('Z', '+00:00'))
-                    else:
-                        patient.date_of_birth = date_of_birth
+                dob_val = _parse_dob(date_of_birth) if isinstance(date_of_birth, str) else date_of_birth
+                if dob_val is not None:
+                    patient.date_of_birth = dob_val
                     updated = True
-                except:
-                    pass
             if name and patient.name != name:
                 patient.name = name
                 updated = True
             
             if updated:
                 await db.commit()
-                await db.refresh(patient)
-            
-            return {
+
+            result = {
                 "patientId": patient.abha_id,
                 "abhaId": patient.abha_id,
                 "status": "FOUND",
@@ -158,45 +198,49 @@ async def discover_patient(
                 "dateOfBirth": patient.date_of_birth.isoformat() if patient.date_of_birth else "",
                 "abhaAddress": patient.abha_address,
             }
+            _discover_cache[cache_key] = (monotonic() + _CACHE_TTL, result)
+            return result
 
-        # Patient not found by mobile - create new one
-        import uuid
-        generated_abha_id = f"abha-{str(uuid.uuid4())[:8]}"
-        abha_address = f"{name.lower().replace(' ', '.')}@abdm" if name else f"pat-{mobile}@abdm"
-
-        # Parse date_of_birth if it's a string
-        parsed_dob = None
-        if date_of_birth:
-            try:
-                from datetime import datetime
-                if isinstance(date_of_birth, str):
-                    parsed_dob = datetime.fromisoformat(date_of_birth.replace('Z', '+00:00'))
-                else:
-                    parsed_dob = date_of_birth
-            except:
-                pass
-
-        # Create new patient
-        patient = Patient(
-            abha_id=generated_abha_id,
-            name=name or f"Patient {generated_abha_id}",
-            mobile=mobile,
-            gender=gender,
-            date_of_birth=parsed_dob,
-            abha_address=abha_address,
-        )
-        db.add(patient)
-        await db.commit()
-        await db.refresh(patient)
+        # Patient not found by mobile - create new one. Serialize first-time
+        # discoveries per mobile so only one contender inserts.
+        async with _mobile_lock(mobile):
+            # Re-check under the lock: a concurrent request may have won.
+            result = await db.execute(_patient_by_mobile(mobile))
+            patient = result.scalar_one_or_none()
+            status = "FOUND"
+
+            if patient is None:
+                generated_abha_id = f"abha-{uuid.uuid4().hex[:8]}"
+                abha_address = f"{name.lower().replace(' ', '.')}@abdm" if name else f"pat-{mobile}@abdm"
+
+                # Parse date_of_birth if it's a string
+                parsed_dob = None
+                if date_of_birth:
+                    parsed_dob = _parse_dob(date_of_birth) if isinstance(date_of_birth, str) else date_of_birth
 
-        return {
+                # Create new patient
+                patient = Patient(
+                    abha_id=generated_abha_id,
+                    name=name or f"Patient {generated_abha_id}",
+                    mobile=mobile,
+                    gender=gender,
+                    date_of_birth=parsed_dob,
+                    abha_address=abha_address,
+                )
+                db.add(patient)
+                await db.commit()
+                status = "REGISTERED"
+
+        result = {
             "patientId": patient.abha_id,
             "abhaId": patient.abha_id,
-            "status": "REGISTERED",
+            "status": status,
             "gender": patient.gender if patient.gender is not None else "",
             "dateOfBirth": patient.date_of_birth.isoformat() if patient.date_of_birth else "",
             "abhaAddress": patient.abha_address,
         }
+        _discover_cache[cache_key] = (monotonic() + _CACHE_TTL, result)
+        return result
     except Exception as e:
         return {"error": f"Failed to discover or register patient: {str(e)}"}
 
@@ -210,11 +254,9 @@ async def init_link(patient_abha_id: str, txn_id: str, hip_id: str = "HOSPITAL-1
     patient = await _ensure_patient(db, patient_abha_id)
     
     # Generate link token
-    link_token = str(uuid.uuid4())
+    link_token = uuid.uuid4().hex
     
-    result = await db.execute(
-        select(LinkingRequest).where(LinkingRequest.txn_id == txn_id)
-    )
+    result = await db.execute(_linking_request_by_txn(txn_id))
     linking_request = result.scalar_one_or_none()
 
     if linking_request:
@@ -223,8 +265,6 @@ async def init_link(patient_abha_id: str, txn_id: str, hip_id: str = "HOSPITAL-1
         linking_request.mobile = patient.mobile
         linking_request.link_token = link_token
         linking_request.status = "LINKED"
-        await db.commit()
-        await db.refresh(linking_request)
     else:
         linking_request = LinkingRequest(
             txn_id=txn_id,
@@ -235,8 +275,7 @@ async def init_link(patient_abha_id: str, txn_id: str, hip_id: str = "HOSPITAL-1
             status="LINKED"
         )
         db.add(linking_request)
-        await db.commit()
-        await db.refresh(linking_request)
+    await db.commit()
 
     return {
         "status": "LINKED",
@@ -254,9 +293,7 @@ async def confirm_link(patient_abha_id: str, txn_id: str, otp: str, hip_id: str
     # Fetch patient to get mobile
     patient = await _ensure_patient(db, patient_abha_id)
     
-    result = await db.execute(
-        select(LinkingRequest).where(LinkingRequest.txn_id == txn_id)
-    )
+    result = await db.execute(_linking_request_by_txn(txn_id))
     linking_request = result.scalar_one_or_none()
 
     if not linking_request:
@@ -268,15 +305,12 @@ async def confirm_link(patient_abha_id: str, txn_id: str, otp: str, hip_id: str
             status="CONFIRMED"
         )
         db.add(linking_request)
-        await db.commit()
-        await db.refresh(linking_request)
     else:
         linking_request.patient_abha_id = patient_abha_id
         linking_request.hip_id = hip_id
         linking_request.mobile = patient.mobile
         linking_request.status = "CONFIRMED"
-        await db.commit()
-        await db.refresh(linking_request)
+    await db.commit()
     
     return {
         "status": "CONFIRMED",
@@ -287,13 +321,14 @@ async def confirm_link(patient_abha_id: str, txn_id: str, otp: str, hip_id: str
 
 async def notify_link(txn_id: str, status: str, db: AsyncSession) -> Dict:
     """Notify about linking status change."""
+    # Atomic UPDATE ... RETURNING: one round trip, no row hydration.
     result = await db.execute(
-        select(LinkingRequest).where(LinkingRequest.txn_id == txn_id)
+        update(LinkingRequest)
+        .where(LinkingRequest.txn_id == txn_id)
+        .values(status=status)
+        .returning(LinkingRequest.txn_id)
     )
-    linking_request = result.scalar()
-    
-    if linking_request:
-        linking_request.status = status
+    if result.scalar() is not None:
         await db.commit()
-    
+
     return {"status": status, "txnId": txn_id}
\ No newline at end of file
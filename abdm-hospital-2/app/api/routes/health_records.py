@@ -160,23 +160,28 @@ async def list_health_records(
     patient_id: str,
     record_type: Optional[str] = Query(None, description="Filter by record type (e.g., PRESCRIPTION)"),
     source_hospital: Optional[str] = Query(None, description="Filter by source hospital"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size (all records if omitted)"),
+    offset: int = Query(0, ge=0, description="Number of records to skip"),
     db: Session = Depends(get_db)
 ):
     """
-    List all health records for a patient.
-    
+    List all health records for a patient, newest first.
+
     Query Parameters:
     - record_type: Optional filter by type (PRESCRIPTION, DIAGNOSTIC_REPORT, etc.)
     - source_hospital: Optional filter by source hospital bridge ID
-    
+    - limit/offset: Optional pagination
+
     Returns:
     - List of health records with all details
     """
-    records = await get_health_records_for_patient(
+    records = get_health_records_for_patient(
         db=db,
         patient_id=patient_id,
         record_type=record_type,
-        source_hospital=source_hospital
+        source_hospital=source_hospital,
+        limit=limit,
+        offset=offset
     )
     
     if not records:
@@ -231,7 +236,7 @@ async def get_patient_health_summary(
             detail=f"Patient {patient_id} not found"
         )
     
-    summary = await get_health_record_summary(db=db, patient_id=patient_id)
+    summary = get_health_record_summary(db=db, patient_id=patient_id)
     return summary
 
 
@@ -262,7 +267,7 @@ async def list_external_health_records(
             detail=f"Patient {patient_id} not found"
         )
     
-    records = await get_external_health_records(db=db, patient_id=patient_id)
+    records = get_external_health_records(db=db, patient_id=patient_id)
     return records
 
 
@@ -489,7 +494,7 @@ async def get_records_by_type(
     Returns:
     - List of health records of the specified type
     """
-    records = await get_health_records_for_patient(
+    records = get_health_records_for_patient(
         db=db,
         patient_id=patient_id,
         record_type=record_type
@@ -533,7 +538,7 @@ async def get_records_from_hospital(
     Returns:
     - List of health records from the specified hospital
     """
-    records = await get_health_records_for_patient(
+    records = get_health_records_for_patient(
         db=db,
         patient_id=patient_id,
         source_hospital=hospital_id
@@ -580,7 +585,7 @@ async def get_complete_patient_history(
     - Separate local and external records
     - Summary statistics
     """
-    history = await get_patient_complete_history(db=db, patient_identifier=patient_id)
+    history = get_patient_complete_history(db=db, patient_identifier=patient_id)
     
     if history.get("error"):
         raise HTTPException(status_code=404, detail=history.get("error"))
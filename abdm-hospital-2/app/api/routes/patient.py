@@ -1,12 +1,18 @@
+import asyncio
+import logging
+from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from app.database.connection import get_db
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, or_, lambda_stmt
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.database.models import Patient
+from app.services.gateway_service import discover_patient
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Models
@@ -30,10 +36,15 @@ class PatientResponse(BaseModel):
     gender: Optional[str] = None
     dateOfBirth: Optional[str] = None
 
+def _patient_by_mobile_stmt(mobile: str):
+    """Lambda-cached SELECT for the hot mobile lookup; only the bind value
+    changes between calls, so statement construction is amortized."""
+    return lambda_stmt(lambda: select(Patient).where(Patient.mobile == mobile))
+
 # Database Logic (Placeholder)
 def find_patient_by_mobile(db: Session, mobile: str):
     """Query the database to find a patient by mobile number."""
-    result = db.execute(select(Patient).where(Patient.mobile == mobile)).scalar_one_or_none()
+    result = db.execute(_patient_by_mobile_stmt(mobile)).scalar_one_or_none()
     if result:
         return {
             "patientId": str(result.id),
@@ -47,136 +58,163 @@ def find_patient_by_mobile(db: Session, mobile: str):
         }
     return None
 
-def create_new_patient(db: Session, patient_data: PatientRegistrationRequest, gateway_patient_id: str = None):
-    """Insert a new patient into the database."""
-    try:
-        from datetime import datetime
-        # Debug log: received gender/dateOfBirth
-        print(f"[DEBUG][backend] create_new_patient received gender: {patient_data.gender}, dateOfBirth: {patient_data.dateOfBirth}")
-        # Treat empty strings as None
-        gender = patient_data.gender if patient_data.gender else None
-        dob_str = patient_data.dateOfBirth if patient_data.dateOfBirth else None
-        # Parse date_of_birth if provided
-        from datetime import datetime
-        date_of_birth = None
-        if dob_str:
-            try:
-                if "T" in dob_str:
-                    # ISO datetime (2024-01-01T00:00:00Z)
-                    date_of_birth = datetime.fromisoformat(dob_str.replace("Z", "+00:00"))
-                else:
-                    # Date-only (2024-01-01)
-                    date_of_birth = datetime.strptime(dob_str, "%Y-%m-%d")
-            except ValueError as e:
-                print(f"[ERROR] Invalid dateOfBirth format: {dob_str}, error: {e}")
-        new_patient = Patient(
-            name=patient_data.name,
-            mobile=patient_data.mobile,
-            abha_id=patient_data.abhaId,
-            abha_address=getattr(patient_data, 'abhaAddress', None),
+def create_new_patient(
+    db: Session,
+    *,
+    name: str,
+    mobile: str,
+    abha_id: Optional[str] = None,
+    abha_address: Optional[str] = None,
+    aadhaar: Optional[str] = None,
+    gender: Optional[str] = None,
+    date_of_birth: Optional[str] = None,
+    gateway_patient_id: str = None,
+):
+    """Insert a new patient into the database.
+
+    Takes plain field values rather than a Pydantic model so callers can
+    merge gateway data without paying for a model re-validation pass.
+    """
+    # %-style args: nothing is formatted unless DEBUG is enabled
+    logger.debug("create_new_patient received gender: %s, dateOfBirth: %s", gender, date_of_birth)
+    # Treat empty strings as None
+    gender = gender if gender else None
+    dob_str = date_of_birth if date_of_birth else None
+    # Parse date_of_birth if provided. On Python 3.11+ fromisoformat accepts
+    # both date-only (2024-01-01) and full ISO 8601 with a Z suffix, so one
+    # fast path replaces the old strptime branch.
+    parsed_dob = None
+    if dob_str:
+        try:
+            parsed_dob = datetime.fromisoformat(dob_str.replace("Z", "+00:00"))
+        except ValueError as e:
+            logger.error("Invalid dateOfBirth format: %s, error: %s", dob_str, e)
+
+    # Atomic insert: ON CONFLICT DO NOTHING + RETURNING replaces the old
+    # insert/catch-IntegrityError/parse-constraint-name dance — no failed
+    # transaction or rollback on the duplicate path.
+    stmt = (
+        sqlite_insert(Patient)
+        .values(
+            name=name,
+            mobile=mobile,
+            abha_id=abha_id,
+            abha_address=abha_address,
             gateway_patient_id=gateway_patient_id,
-            aadhaar=patient_data.aadhaar,
+            aadhaar=aadhaar,
             gender=gender,
-            date_of_birth=date_of_birth
+            date_of_birth=parsed_dob,
         )
-        db.add(new_patient)
-        db.commit()
-        db.refresh(new_patient)
-        # Debug log: after DB insert
-        print(f"[DEBUG][backend] Stored gender: {new_patient.gender}, date_of_birth: {new_patient.date_of_birth}")
-        return {
-            "patientId": str(new_patient.id),
-            "name": new_patient.name,
-            "mobile": new_patient.mobile,
-            "abhaId": new_patient.abha_id,
-            "abhaAddress": new_patient.abha_address,
-            "gatewayPatientId": new_patient.gateway_patient_id,
-            "aadhaar": new_patient.aadhaar,
-            "gender": new_patient.gender,
-            "dateOfBirth": new_patient.date_of_birth.isoformat() if new_patient.date_of_birth else None
-        }
-    except IntegrityError as e:
-        db.rollback()
-        error_msg = str(e.orig)
-        if "aadhaar" in error_msg.lower():
-            raise HTTPException(
-                status_code=400,
-                detail="A patient with this Aadhaar number already exists"
-            )
-        elif "abha_id" in error_msg.lower():
-            raise HTTPException(
-                status_code=400,
-                detail="A patient with this ABHA ID already exists"
-            )
-        elif "mobile" in error_msg.lower():
-            raise HTTPException(
-                status_code=400,
-                detail="A patient with this mobile number already exists"
-            )
+        .on_conflict_do_nothing()
+        .returning(Patient)
+    )
+    new_patient = db.execute(stmt).scalars().first()
+
+    if new_patient is None:
+        # Nothing inserted: some unique column collided. Diagnose with one
+        # lookup, keeping the old per-column error messages and precedence.
+        conditions = [Patient.mobile == mobile]
+        if abha_id:
+            conditions.append(Patient.abha_id == abha_id)
+        if aadhaar:
+            conditions.append(Patient.aadhaar == aadhaar)
+        rows = db.execute(select(Patient.mobile, Patient.abha_id, Patient.aadhaar).where(or_(*conditions))).all()
+        if aadhaar and any(row.aadhaar == aadhaar for row in rows):
+            detail = "A patient with this Aadhaar number already exists"
+        elif abha_id and any(row.abha_id == abha_id for row in rows):
+            detail = "A patient with this ABHA ID already exists"
+        elif any(row.mobile == mobile for row in rows):
+            detail = "A patient with this mobile number already exists"
         else:
-            raise HTTPException(
-                status_code=400,
-                detail="A patient with these details already exists"
-            )
+            detail = "A patient with these details already exists"
+        raise HTTPException(status_code=400, detail=detail)
+
+    logger.debug("Stored gender: %s, date_of_birth: %s", new_patient.gender, new_patient.date_of_birth)
+    # Build the response before commit so the expired instance isn't re-read
+    result = {
+        "patientId": str(new_patient.id),
+        "name": new_patient.name,
+        "mobile": new_patient.mobile,
+        "abhaId": new_patient.abha_id,
+        "abhaAddress": new_patient.abha_address,
+        "gatewayPatientId": new_patient.gateway_patient_id,
+        "aadhaar": new_patient.aadhaar,
+        "gender": new_patient.gender,
+        "dateOfBirth": new_patient.date_of_birth.isoformat() if new_patient.date_of_birth else None
+    }
+    db.commit()
+    return result
 
 # Endpoints
 @router.post("/api/patient/register", response_model=PatientResponse)
-async def register_patient(
+def register_patient(
     request: PatientRegistrationRequest,
     db: Session = Depends(get_db)
 ):
-    """Register a new patient or identify an existing one."""
-    # Debug: Print received gender and dateOfBirth
-    print(f"[DEBUG][backend] register_patient received gender: {request.gender}, dateOfBirth: {request.dateOfBirth}")
-    # Check for existing patient by ABHA ID first (if provided)
+    """Register a new patient or identify an existing one.
+
+    Deliberately a plain def: the handler is dominated by synchronous
+    SQLAlchemy calls, so FastAPI dispatches it to the threadpool instead of
+    blocking the shared event loop.
+    """
+    logger.debug("register_patient received gender: %s, dateOfBirth: %s", request.gender, request.dateOfBirth)
+    # One OR-filter SELECT covers the ABHA ID / Aadhaar / mobile existence
+    # checks that used to be three sequential round trips. Precedence when
+    # classifying a match stays ABHA ID, then Aadhaar, then mobile.
+    conditions = [Patient.mobile == request.mobile]
     if request.abhaId:
-        existing_by_abha = db.execute(
-            select(Patient).where(Patient.abha_id == request.abhaId)
-        ).scalar_one_or_none()
-        
-        if existing_by_abha:
-            return {
-                "patientId": str(existing_by_abha.id),
-                "name": existing_by_abha.name,
-                "mobile": existing_by_abha.mobile,
-                "abhaId": existing_by_abha.abha_id,
-                "aadhaar": existing_by_abha.aadhaar,
-                "gender": existing_by_abha.gender,
-                "dateOfBirth": existing_by_abha.date_of_birth.isoformat() if existing_by_abha.date_of_birth else None,
-                "gatewayPatientId": existing_by_abha.gateway_patient_id,
-                "message": "Patient already registered with this ABHA ID"
-            }
-    
-    # Check for existing patient by Aadhaar (if provided)
+        conditions.append(Patient.abha_id == request.abhaId)
     if request.aadhaar:
-        existing_by_aadhaar = db.execute(
-            select(Patient).where(Patient.aadhaar == request.aadhaar)
-        ).scalar_one_or_none()
-        
-        if existing_by_aadhaar:
-            # Patient exists with same Aadhaar, update ABHA ID if provided and not set
-            if request.abhaId and not existing_by_aadhaar.abha_id:
-                existing_by_aadhaar.abha_id = request.abhaId
-                db.commit()
-                db.refresh(existing_by_aadhaar)
-            
-            return {
-                "patientId": str(existing_by_aadhaar.id),
-                "name": existing_by_aadhaar.name,
-                "mobile": existing_by_aadhaar.mobile,
-                "abhaId": existing_by_aadhaar.abha_id,
-                "aadhaar": existing_by_aadhaar.aadhaar,
-                "gender": existing_by_aadhaar.gender,
-                "dateOfBirth": existing_by_aadhaar.date_of_birth.isoformat() if existing_by_aadhaar.date_of_birth else None,
-                "gatewayPatientId": existing_by_aadhaar.gateway_patient_id,
-                "message": "Patient already registered with this Aadhaar number"
-            }
-    
-    # Check by mobile number
-    existing_patient = find_patient_by_mobile(db, request.mobile)
-    if existing_patient:
-        return existing_patient
-    
+        conditions.append(Patient.aadhaar == request.aadhaar)
+    matches = db.execute(select(Patient).where(or_(*conditions))).scalars().all()
+
+    existing_by_abha = next((p for p in matches if request.abhaId and p.abha_id == request.abhaId), None)
+    if existing_by_abha:
+        return {
+            "patientId": str(existing_by_abha.id),
+            "name": existing_by_abha.name,
+            "mobile": existing_by_abha.mobile,
+            "abhaId": existing_by_abha.abha_id,
+            "aadhaar": existing_by_abha.aadhaar,
+            "gender": existing_by_abha.gender,
+            "dateOfBirth": existing_by_abha.date_of_birth.isoformat() if existing_by_abha.date_of_birth else None,
+            "gatewayPatientId": existing_by_abha.gateway_patient_id,
+            "message": "Patient already registered with this ABHA ID"
+        }
+
+    existing_by_aadhaar = next((p for p in matches if request.aadhaar and p.aadhaar == request.aadhaar), None)
+    if existing_by_aadhaar:
+        # Patient exists with same Aadhaar, update ABHA ID if provided and not set
+        if request.abhaId and not existing_by_aadhaar.abha_id:
+            existing_by_aadhaar.abha_id = request.abhaId
+            db.commit()
+            db.refresh(existing_by_aadhaar)
+
+        return {
+            "patientId": str(existing_by_aadhaar.id),
+            "name": existing_by_aadhaar.name,
+            "mobile": existing_by_aadhaar.mobile,
+            "abhaId": existing_by_aadhaar.abha_id,
+            "aadhaar": existing_by_aadhaar.aadhaar,
+            "gender": existing_by_aadhaar.gender,
+            "dateOfBirth": existing_by_aadhaar.date_of_birth.isoformat() if existing_by_aadhaar.date_of_birth else None,
+            "gatewayPatientId": existing_by_aadhaar.gateway_patient_id,
+            "message": "Patient already registered with this Aadhaar number"
+        }
+
+    existing_by_mobile = next((p for p in matches if p.mobile == request.mobile), None)
+    if existing_by_mobile:
+        return {
+            "patientId": str(existing_by_mobile.id),
+            "name": existing_by_mobile.name,
+            "mobile": existing_by_mobile.mobile,
+            "abhaId": existing_by_mobile.abha_id,
+            "gatewayPatientId": existing_by_mobile.gateway_patient_id,
+            "aadhaar": existing_by_mobile.aadhaar,
+            "gender": existing_by_mobile.gender,
+            "dateOfBirth": existing_by_mobile.date_of_birth.isoformat() if existing_by_mobile.date_of_birth else None
+        }
+
     # Step 1: First register with gateway to get gateway_patient_id
     gateway_patient_id = None
     gateway_abha_id = None
@@ -184,9 +222,6 @@ async def register_patient(
     gateway_result = None
     
     try:
-        from app.services.gateway_service import discover_patient
-        from datetime import datetime
-        
         # Prepare gateway payload with all available data
         gateway_payload = {
             "mobile": request.mobile,
@@ -201,92 +236,67 @@ async def register_patient(
         if request.aadhaar:
             gateway_payload["aadhaar"] = request.aadhaar
         
-        # Call gateway discover endpoint
-        gateway_result = await discover_patient(gateway_payload)
+        # Call gateway discover endpoint (coroutine, driven from this worker
+        # thread the same way the consent background task runs its own)
+        gateway_result = asyncio.run(discover_patient(gateway_payload))
         if isinstance(gateway_result, dict):
             gateway_patient_id = gateway_result.get("patientId")
             gateway_abha_id = gateway_result.get("abhaId") or request.abhaId
             gateway_abha_address = gateway_result.get("abhaAddress")
-            print(f"✓ Patient registered with gateway: {gateway_patient_id}")
+            logger.info("Patient registered with gateway: %s", gateway_patient_id)
         else:
-            print(f"⚠️ Gateway returned empty or invalid response: {gateway_result!r}")
-            
+            logger.warning("Gateway returned empty or invalid response: %r", gateway_result)
+
     except Exception as e:
-        print(f"⚠️ Gateway registration failed (non-critical): {str(e)}")
+        logger.warning("Gateway registration failed (non-critical): %s", e)
         # Continue with local registration even if gateway fails
     
-    # Step 2: Create new patient in local DB with gateway_patient_id
-    # Prepare all gateway fields for Patient
-    update_fields = {}
-    if gateway_abha_id:
-        update_fields["abhaId"] = gateway_abha_id
-    if gateway_abha_address:
-        update_fields["abhaAddress"] = gateway_abha_address
-    if isinstance(gateway_result, dict):
-        if gateway_result.get("gender"):
-            update_fields["gender"] = gateway_result.get("gender")
-        if gateway_result.get("dateOfBirth"):
-            update_fields["dateOfBirth"] = gateway_result.get("dateOfBirth")
-    patient_data = request.copy(update=update_fields)
-    new_patient = create_new_patient(db, patient_data, gateway_patient_id=gateway_patient_id)
+    # Step 2: Create new patient in local DB with gateway_patient_id.
+    # Gateway fields are merged into the creation call up front (gateway
+    # values win over the request's), so the row is written once — no
+    # re-select/patch round trip and no request.copy() re-validation pass.
+    gateway_gender = gateway_result.get("gender") if isinstance(gateway_result, dict) else None
+    gateway_dob = gateway_result.get("dateOfBirth") if isinstance(gateway_result, dict) else None
+    new_patient = create_new_patient(
+        db,
+        name=request.name,
+        mobile=request.mobile,
+        abha_id=gateway_abha_id or request.abhaId,
+        abha_address=gateway_abha_address or request.abhaAddress,
+        aadhaar=request.aadhaar,
+        gender=gateway_gender or request.gender,
+        date_of_birth=gateway_dob or request.dateOfBirth,
+        gateway_patient_id=gateway_patient_id,
+    )
 
-    # Update Patient object in DB with any missing gateway fields
-    import uuid
-    patient_uuid = new_patient["patientId"]
-    if isinstance(patient_uuid, str):
-        try:
-            patient_uuid = uuid.UUID(patient_uuid)
-        except Exception:
-            pass
-    patient_obj = db.execute(
-        select(Patient).where(Patient.id == patient_uuid)
-    ).scalar_one_or_none()
-    if patient_obj:
-        updated = False
-        if gateway_abha_id and not patient_obj.abha_id:
-            patient_obj.abha_id = gateway_abha_id
-            new_patient["abhaId"] = gateway_abha_id
-            updated = True
-        if gateway_abha_address and not patient_obj.abha_address:
-            patient_obj.abha_address = gateway_abha_address
-            new_patient["abhaAddress"] = gateway_abha_address
-            updated = True
-        if gateway_result:
-            if gateway_result.get("gender") and not patient_obj.gender:
-                patient_obj.gender = gateway_result.get("gender")
-                new_patient["gender"] = gateway_result.get("gender")
-                updated = True
-            if gateway_result.get("dateOfBirth") and not patient_obj.date_of_birth:
-                from datetime import datetime
-                try:
-                    patient_obj.date_of_birth = datetime.fromisoformat(gateway_result.get("dateOfBirth"))
-                    new_patient["dateOfBirth"] = gateway_result.get("dateOfBirth")
-                    updated = True
-                except:
-                    pass
-        if updated:
-            db.commit()
-            db.refresh(patient_obj)
-            # Debug log: after DB update
-            print(f"[DEBUG][backend] Updated gender: {patient_obj.gender}, date_of_birth: {patient_obj.date_of_birth}")
     new_patient["message"] = "Patient registered successfully" + (" and synced with gateway" if gateway_patient_id else "")
     return new_patient
 
-@router.get("/api/patient/list", response_model=List[PatientResponse])
+@router.get("/api/patient/list")
 def list_patients(db: Session = Depends(get_db)):
     """Get all registered patients."""
-    patients = db.execute(select(Patient)).scalars().all()
-    return [
+    # Column projection: Row tuples skip ORM entity hydration, which adds up
+    # on a list endpoint returning every patient.
+    rows = db.execute(
+        select(
+            Patient.id, Patient.name, Patient.mobile, Patient.abha_id,
+            Patient.abha_address, Patient.aadhaar, Patient.gateway_patient_id,
+            Patient.gender, Patient.date_of_birth,
+        )
+    ).all()
+    # Dicts are already JSON-safe; serialize once instead of re-validating
+    # every row through the response model first.
+    return JSONResponse(content=[
         {
-            "patientId": str(patient.id),
-            "name": patient.name,
-            "mobile": patient.mobile,
-            "abhaId": patient.abha_id,
-            "abhaAddress": getattr(patient, "abha_address", None),
-            "aadhaar": patient.aadhaar,
-            "gatewayPatientId": patient.gateway_patient_id,
-            "gender": patient.gender,
-            "dateOfBirth": patient.date_of_birth.isoformat() if patient.date_of_birth else None
+            "patientId": str(row.id),
+            "name": row.name,
+            "mobile": row.mobile,
+            "abhaId": row.abha_id,
+            "abhaAddress": row.abha_address,
+            "aadhaar": row.aadhaar,
+            "gatewayPatientId": row.gateway_patient_id,
+            "gender": row.gender,
+            "dateOfBirth": row.date_of_birth.isoformat() if row.date_of_birth else None
         }
-        for patient in patients
-    ]
\ No newline at end of file
+        for row in rows
+    ])
\ No newline at end of file
@@ -1,61 +1,57 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Body
+from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from app.database.connection import get_db
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, lambda_stmt
 from app.database.models import Visit, Patient
 import uuid
 from datetime import datetime
+from time import monotonic
 from app.services import gateway_service
 import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
-# ...existing code...
+# Column projection shared by the visit list endpoints: Row tuples skip ORM
+# entity hydration, which adds up on endpoints returning many visits.
+_VISIT_COLUMNS = (
+    Visit.id, Visit.patient_id, Visit.visit_type, Visit.department,
+    Visit.doctor_id, Visit.visit_date, Visit.status,
+)
 
-# PATCH endpoint to update visit status
-@router.patch("/api/visit/{visit_id}/status")
-def update_visit_status(visit_id: str, status: str = Body(...), db: Session = Depends(get_db)):
-    visit_uuid = uuid.UUID(visit_id)
-    visit = db.query(Visit).filter(Visit.id == visit_uuid).first()
-    if not visit:
-        raise HTTPException(status_code=404, detail="Visit not found")
-    visit.status = status
-    db.commit()
-    db.refresh(visit)
+
+def _visit_row_to_dict(row):
     return {
-        "visitId": str(visit.id),
-        "status": visit.status
+        "visitId": str(row.id),
+        "patientId": str(row.patient_id),
+        "visitType": row.visit_type,
+        "department": row.department,
+        "doctorId": row.doctor_id,
+        "visitDate": row.visit_date.isoformat(),
+        "status": row.status
     }
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Body
-from pydantic import BaseModel
-from typing import Optional, List
-from app.database.connection import get_db
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-from app.database.models import Visit, Patient
-import uuid
-from datetime import datetime
-from app.services import gateway_service
-import asyncio
-import logging
 
-logger = logging.getLogger(__name__)
 
-router = APIRouter()
+def _visits_by_patient_stmt(patient_uuid):
+    """Lambda-cached SELECT for the per-patient visit listing; only the bind
+    value changes between calls, so statement construction is amortized."""
+    return lambda_stmt(lambda: select(*_VISIT_COLUMNS).where(Visit.patient_id == patient_uuid))
+
 # PATCH endpoint to update visit status
 @router.patch("/api/visit/{visit_id}/status")
 def update_visit_status(visit_id: str, status: str = Body(...), db: Session = Depends(get_db)):
-    visit_uuid = uuid.UUID(visit_id)
-    visit = db.query(Visit).filter(Visit.id == visit_uuid).first()
+    # Identity-map PK fast-path: no filter compilation, and free if the row
+    # is already loaded in this session.
+    visit = db.get(Visit, uuid.UUID(visit_id))
     if not visit:
         raise HTTPException(status_code=404, detail="Visit not found")
     visit.status = status
     db.commit()
-    db.refresh(visit)
     return {
         "visitId": str(visit.id),
         "status": visit.status
@@ -106,136 +102,176 @@ def create_new_visit(db: Session, visit_data: VisitRequest):
         "status": new_visit.status
     }
 
-# Background task to create consent request in gateway
-def create_consent_request(visit_id: str, patient_id: str, department: str, visit_type: str):
-    """
-    Background task to create consent request in ABDM Gateway for a visit.
-    """
+# Persistent consent worker. Visits enqueue their consent-request jobs on a
+# single asyncio.Queue consumed by one task on the main event loop, instead of
+# spinning up (and tearing down) a fresh event loop per visit inside a
+# BackgroundTasks thread.
+_consent_queue: Optional[asyncio.Queue] = None
+_consent_loop: Optional[asyncio.AbstractEventLoop] = None
+_consent_worker_task = None
+
+# The bridge ID is constant per deployment, so resolve it once an hour
+# instead of on every visit's consent job.
+_BRIDGE_ID_TTL = 3600.0
+_bridge_id_cache = None
+
+
+def _get_bridge_id() -> str:
+    global _bridge_id_cache
+    now = monotonic()
+    if _bridge_id_cache and _bridge_id_cache[0] > now:
+        return _bridge_id_cache[1]
+    bridge_id = gateway_service.TokenManager.get_bridge_details()[0]
+    _bridge_id_cache = (now + _BRIDGE_ID_TTL, bridge_id)
+    return bridge_id
+
+
+async def create_consent_request(visit_id: str, patient_id: str, department: str, visit_type: str):
+    """Create a consent request in the ABDM Gateway for a visit."""
     try:
         from app.database.connection import SessionLocal
-        from app.services.gateway_service import TokenManager, init_consent_request
+        from app.services.gateway_service import init_consent_request
         db = SessionLocal()
-        
+
         logger.info(f"Creating consent request for visit {visit_id}")
-        
+
         # Get patient details
         patient_uuid = uuid.UUID(patient_id)
         patient = db.query(Patient).filter(Patient.id == patient_uuid).first()
-        
+
         if not patient:
             logger.error(f"Patient not found: {patient_id}")
             return
-        
+
         if not patient.abha_id:
             logger.warning(f"Patient {patient_id} has no ABHA ID, skipping consent request creation")
             return
-        
-        # Get bridge ID
+
+        # Get bridge ID (TTL-cached; constant per deployment)
         try:
-            bridge_id = TokenManager.get_bridge_details()[0]
+            bridge_id = _get_bridge_id()
         except Exception as e:
             logger.error(f"Failed to get bridge ID: {str(e)}")
             return
-        
+
         # Create consent request in gateway
         purpose = {
             "code": "CAREMGT",
             "text": f"Care Management - {visit_type} visit for {department}"
         }
-        
-        consent_result = asyncio.run(init_consent_request(
+
+        consent_result = await init_consent_request(
             patient_id=patient.abha_id,
             hip_id=bridge_id,
             purpose=purpose
-        ))
-        
+        )
+
         if consent_result:
             consent_id = consent_result.get("consentRequestId")
             logger.info(f"Consent request created in gateway: {consent_id} for visit {visit_id}")
         else:
             logger.warning(f"Consent request creation returned empty result")
-        
+
     except Exception as e:
         logger.error(f"Error creating consent request: {str(e)}")
     finally:
         db.close()
 
+
+async def _consent_worker():
+    """Drain the consent queue for the lifetime of the app."""
+    while True:
+        job = await _consent_queue.get()
+        try:
+            await create_consent_request(*job)
+        except Exception as e:
+            logger.error(f"Consent worker error: {str(e)}")
+        finally:
+            _consent_queue.task_done()
+
+
+async def start_consent_worker():
+    """Create the queue and consumer task; called from app startup."""
+    global _consent_queue, _consent_loop, _consent_worker_task
+    _consent_queue = asyncio.Queue()
+    _consent_loop = asyncio.get_running_loop()
+    _consent_worker_task = asyncio.create_task(_consent_worker())
+
+
+async def stop_consent_worker():
+    """Cancel the consumer task; called from app shutdown."""
+    global _consent_worker_task
+    if _consent_worker_task:
+        _consent_worker_task.cancel()
+        _consent_worker_task = None
+
+
+def _enqueue_consent_request(*job):
+    if _consent_queue is not None and _consent_loop is not None:
+        # Sync handlers run in the threadpool, so hop to the loop thread.
+        _consent_loop.call_soon_threadsafe(_consent_queue.put_nowait, job)
+    else:
+        # Worker not running (e.g. app started without the startup hook):
+        # fall back to running the job inline on a throwaway loop.
+        asyncio.run(create_consent_request(*job))
+
 # Endpoints
 @router.post("/api/visit/create", response_model=VisitResponse)
 def create_visit(
     request: VisitRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """Create a new visit and automatically create consent request in gateway."""
     new_visit = create_new_visit(db, request)
-    
-    # Add background task to create consent request in gateway
-    background_tasks.add_task(
-        create_consent_request,
+
+    # Hand the consent-request job to the persistent worker
+    _enqueue_consent_request(
         new_visit["visitId"],
         new_visit["patientId"],
         request.department,
         request.visitType
     )
-    
+
     return new_visit
 
-@router.get("/api/visit/list", response_model=List[VisitResponse])
+@router.get("/api/visit/list")
 def list_visits(db: Session = Depends(get_db)):
     """Get all visits."""
-    visits = db.execute(select(Visit)).scalars().all()
-    return [
-        {
-            "visitId": str(visit.id),
-            "patientId": str(visit.patient_id),
-            "visitType": visit.visit_type,
-            "department": visit.department,
-            "doctorId": visit.doctor_id,
-            "visitDate": visit.visit_date.isoformat(),
-            "status": visit.status
-        }
-        for visit in visits
-    ]
+    rows = db.execute(select(*_VISIT_COLUMNS)).all()
+    # Dicts are already JSON-safe; serialize once instead of re-validating
+    # every row through the response model first.
+    return JSONResponse(content=[_visit_row_to_dict(row) for row in rows])
 
-@router.get("/api/visit/patient/{patient_id}", response_model=List[VisitResponse])
+@router.get("/api/visit/patient/{patient_id}")
 def get_visits_by_patient(patient_id: str, db: Session = Depends(get_db)):
     """Get all visits for a specific patient."""
     patient_uuid = uuid.UUID(patient_id)
-    visits = db.execute(select(Visit).where(Visit.patient_id == patient_uuid)).scalars().all()
-    return [
-        {
-            "visitId": str(visit.id),
-            "patientId": str(visit.patient_id),
-            "visitType": visit.visit_type,
-            "department": visit.department,
-            "doctorId": visit.doctor_id,
-            "visitDate": visit.visit_date.isoformat(),
-            "status": visit.status
-        }
-        for visit in visits
-    ]
+    rows = db.execute(_visits_by_patient_stmt(patient_uuid)).all()
+    return JSONResponse(content=[_visit_row_to_dict(row) for row in rows])
 
-@router.get("/api/visit/active", response_model=List[VisitResponse])
+@router.get("/api/visit/active")
 def get_active_visits(db: Session = Depends(get_db)):
     """Get all active visits (Scheduled or In Progress)."""
     from sqlalchemy import or_
-    visits = db.execute(
-        select(Visit).where(or_(Visit.status == "Scheduled", Visit.status == "In Progress"))
-    ).scalars().all()
-    
+    # Single JOIN returns visit + patient name together instead of one
+    # Patient SELECT per visit (1+N queries collapsed into 1).
+    rows = db.execute(
+        select(Visit, Patient.name)
+        .outerjoin(Patient, Patient.id == Visit.patient_id)
+        .where(or_(Visit.status == "Scheduled", Visit.status == "In Progress"))
+    ).all()
+
     # Include patient name for better display
-    result = []
-    for visit in visits:
-        patient = db.execute(select(Patient).where(Patient.id == visit.patient_id)).scalar_one_or_none()
-        result.append({
+    return JSONResponse(content=[
+        {
             "visitId": str(visit.id),
             "patientId": str(visit.patient_id),
-            "patientName": patient.name if patient else "Unknown",
+            "patientName": patient_name if patient_name else "Unknown",
             "visitType": visit.visit_type,
             "department": visit.department,
             "doctorId": visit.doctor_id,
             "visitDate": visit.visit_date.isoformat(),
             "status": visit.status
-        })
-    return result
\ No newline at end of file
+        }
+        for visit, patient_name in rows
+    ])
\ No newline at end of file
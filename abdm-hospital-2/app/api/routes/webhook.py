@@ -344,7 +344,7 @@ async def fetch_and_send_health_data_to_gateway(
         print(f"\n🔍 HIP: Fetching health data for request {request_id}...")
         
         # Get mock health records (in production, this would query the actual hospital DB)
-        records = await get_mock_health_records(
+        records = get_mock_health_records(
             patient_id=patient_id,
             data_types=data_types,
             care_context_ids=care_context_ids
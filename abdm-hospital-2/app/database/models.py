@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Boolean, Integer, JSON
+from sqlalchemy import Column, String, ForeignKey, DateTime, Text, Boolean, Integer, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.database.connection import Base
@@ -10,10 +10,10 @@ class Patient(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     name = Column(String, nullable=False)
-    mobile = Column(String, unique=True, nullable=False)
-    abha_id = Column(String, unique=True, nullable=True)
+    mobile = Column(String, unique=True, index=True, nullable=False)
+    abha_id = Column(String, unique=True, index=True, nullable=True)
     gateway_patient_id = Column(String, unique=True, nullable=True)  # Links to gateway patient ABHA ID
-    aadhaar = Column(String, unique=True, nullable=True)
+    aadhaar = Column(String, unique=True, index=True, nullable=True)
     gender = Column(String, nullable=True)  # Male, Female, Other
     date_of_birth = Column(DateTime, nullable=True)
     abha_address = Column(String, nullable=True)  # ABHA address format: user@abdm
@@ -26,6 +26,8 @@ class Patient(Base):
 
 class Visit(Base):
     __tablename__ = "visits"
+    # Covers the active-visits listing (filter on status, join on patient_id)
+    __table_args__ = (Index("ix_visits_status_patient_id", "status", "patient_id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False)
@@ -54,6 +56,13 @@ class HealthRecord(Base):
     Supports both local records and external records with encryption support.
     """
     __tablename__ = "health_records"
+    # Cover the per-patient listings: date-ordered history and by-type
+    # filtering. SQLite walks a b-tree in either direction, so an explicit
+    # DESC index for the newest-first ordering isn't needed.
+    __table_args__ = (
+        Index("ix_health_records_patient_id_record_date", "patient_id", "record_date"),
+        Index("ix_health_records_patient_id_record_type", "patient_id", "record_type"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
     patient_id = Column(UUID(as_uuid=True), ForeignKey("patients.id"), nullable=False)
@@ -69,6 +78,10 @@ class HealthRecord(Base):
     # Source tracking
     source_hospital = Column(String, nullable=True)  # Which hospital sent it (bridge_id)
     request_id = Column(String, nullable=True)  # Gateway request ID for tracking
+
+    # Care context link (legacy rows predate this FK and are matched by
+    # naming convention instead)
+    care_context_id = Column(UUID(as_uuid=True), ForeignKey("care_contexts.id"), nullable=True, index=True)
     
     # Encryption tracking
     was_encrypted = Column(Boolean, default=False)  # Whether it arrived encrypted
@@ -10,8 +10,19 @@ load_dotenv()
 # Database URL from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 
-# Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {})
+# Create the SQLAlchemy engine with a tuned pool: endpoints such as patient
+# registration chain several queries per request, and the default pool (5+10)
+# stalls once ~15 requests hold connections concurrently. pool_pre_ping drops
+# dead connections instead of handing them out; pool_recycle bounds their age.
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+    pool_size=20,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
 
 # Create a configured "Session" class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -32,7 +32,17 @@ async def startup_event():
     """Initialize database on startup if needed."""
     from app.database.connection import SessionLocal
     from app.database.models import Patient
-    
+    from app.api.routes.visit import start_consent_worker
+    from app.services.health_data_service import start_record_flush_worker
+
+    # Persistent consumer for visit consent requests (one queue + task on
+    # the main event loop instead of one event loop per visit)
+    await start_consent_worker()
+
+    # Batched flush of webhook-received health records (one commit per
+    # flush window instead of one per webhook)
+    await start_record_flush_worker()
+
     # Try to connect to database and check if tables exist
     db = SessionLocal()
     try:
@@ -53,6 +63,14 @@ async def startup_event():
     finally:
             db.close()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background worker tasks."""
+    from app.api.routes.visit import stop_consent_worker
+    from app.services.health_data_service import stop_record_flush_worker
+    await stop_consent_worker()
+    await stop_record_flush_worker()
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -3,42 +3,84 @@ Health data service for ABDM Hospital.
 Handles storage, retrieval, and management of health records.
 """
 
+import asyncio
+import logging
 from datetime import datetime, timezone
+from functools import lru_cache
+from time import monotonic
 from typing import List, Dict, Any, Optional
 import uuid
-from sqlalchemy.orm import Session
-from sqlalchemy import select, and_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, and_, insert, update, func, lambda_stmt, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 
 from app.database.models import HealthRecord, Patient, CareContext
 from app.utils.encryption import decrypt_health_data
 from app.services.gateway_service import link_care_contexts_to_gateway
 
+logger = logging.getLogger(__name__)
+
+
+def _patient_by_abha_stmt(abha_id: str):
+    """Lambda-cached SELECT for the hot ABHA lookup; only the bind value
+    changes between calls, so statement construction is amortized."""
+    return lambda_stmt(lambda: select(Patient).where(Patient.abha_id == abha_id))
+
+
+def _records_for_patient_stmt(patient_uuid, record_type, source_hospital, limit, offset):
+    """Lambda-cached records SELECT. Each filter combination caches its own
+    compiled form; the newest-first ordering is served by the composite
+    (patient_id, record_date) index."""
+    stmt = lambda_stmt(lambda: select(HealthRecord).where(HealthRecord.patient_id == patient_uuid))
+    if record_type:
+        stmt += lambda s: s.where(HealthRecord.record_type == record_type)
+    if source_hospital:
+        stmt += lambda s: s.where(HealthRecord.source_hospital == source_hospital)
+    stmt += lambda s: s.order_by(HealthRecord.record_date.desc())
+    if offset:
+        stmt += lambda s: s.offset(offset)
+    if limit is not None:
+        stmt += lambda s: s.limit(limit)
+    return stmt
+
 
 def _get_or_create_patient_by_identifier(db: Session, patient_identifier: str) -> Optional[Patient]:
     """Resolve patient by UUID or ABHA; create stub if missing."""
     try:
         patient_uuid = uuid.UUID(patient_identifier)
-        patient = db.execute(select(Patient).where(Patient.id == patient_uuid)).scalar_one_or_none()
+        patient = db.get(Patient, patient_uuid)
         if patient:
             return patient
     except Exception:
         patient_uuid = None
 
     # Try ABHA match
-    patient = db.execute(select(Patient).where(Patient.abha_id == patient_identifier)).scalar_one_or_none()
+    patient = db.execute(_patient_by_abha_stmt(patient_identifier)).scalar_one_or_none()
     if patient:
         return patient
 
-    # Auto-create minimal patient record to avoid losing incoming data
-    patient = Patient(
-        id=patient_uuid or uuid.uuid4(),
-        name=f"Patient {patient_identifier}",
-        mobile=None,
-        abha_id=patient_identifier,
+    # Auto-create minimal patient record to avoid losing incoming data.
+    # ON CONFLICT DO NOTHING + RETURNING makes the create race-safe: a
+    # concurrent webhook creating the same stub loses the insert quietly and
+    # picks up the winner's row instead of failing the whole store.
+    stmt = (
+        sqlite_insert(Patient)
+        .values(
+            id=patient_uuid or uuid.uuid4(),
+            name=f"Patient {patient_identifier}",
+            mobile=None,
+            abha_id=patient_identifier,
+        )
+        .on_conflict_do_nothing()
+        .returning(Patient)
     )
-    db.add(patient)
+    patient = db.execute(stmt).scalars().first()
+    if patient is None:
+        patient = db.execute(
+            select(Patient).where(Patient.abha_id == patient_identifier)
+        ).scalar_one_or_none()
     db.commit()
-    db.refresh(patient)
     return patient
 
 
@@ -55,49 +97,179 @@ def ensure_patient_has_abha_id(db: Session, patient_uuid: uuid.UUID) -> Optional
         Patient ABHA ID or None if patient not found
     """
     try:
-        patient = db.execute(
-            select(Patient).where(Patient.id == patient_uuid)
-        ).scalar_one_or_none()
-        
-        if not patient:
-            print(f"❌ Patient {patient_uuid} not found")
+        # Column projection: only name and abha_id are needed to decide
+        row = db.execute(
+            select(Patient.name, Patient.abha_id).where(Patient.id == patient_uuid)
+        ).first()
+
+        if not row:
+            logger.error("Patient %s not found", patient_uuid)
             return None
-        
+
         # If patient already has ABHA ID, return it
-        if patient.abha_id:
-            print(f"✓ Patient already has ABHA ID: {patient.abha_id}")
-            return patient.abha_id
-        
+        if row.abha_id:
+            logger.debug("Patient already has ABHA ID: %s", row.abha_id)
+            return row.abha_id
+
         # Generate new ABHA ID if missing
         # Format: patient-{first_3_chars_of_name}-{uuid_short}@abdm
-        name_prefix = patient.name.split()[0][:3].lower() if patient.name else "pat"
+        name_prefix = row.name.split()[0][:3].lower() if row.name else "pat"
         short_uuid = str(patient_uuid)[:8].lower()
         new_abha_id = f"patient-{name_prefix}-{short_uuid}@abdm"
-        
-        # Ensure uniqueness by checking if this ABHA ID already exists
-        existing = db.execute(
-            select(Patient).where(Patient.abha_id == new_abha_id)
-        ).scalar_one_or_none()
-        
-        if existing:
-            # Add timestamp suffix for uniqueness
-            from datetime import datetime
+
+        # Guarded direct UPDATE: no entity load or refresh, and the
+        # abha_id IS NULL predicate makes concurrent generators harmless.
+        # The unique index rejects collisions; retry once with a suffix.
+        stmt = update(Patient).where(
+            Patient.id == patient_uuid, Patient.abha_id.is_(None)
+        )
+        try:
+            result = db.execute(stmt.values(abha_id=new_abha_id))
+            db.commit()
+        except IntegrityError:
+            db.rollback()
             timestamp = int(datetime.utcnow().timestamp()) % 10000
             new_abha_id = f"patient-{name_prefix}-{short_uuid}-{timestamp}@abdm"
-        
-        patient.abha_id = new_abha_id
-        db.commit()
-        db.refresh(patient)
-        
-        print(f"✓ Generated new ABHA ID for patient: {new_abha_id}")
+            result = db.execute(stmt.values(abha_id=new_abha_id))
+            db.commit()
+
+        if result.rowcount == 0:
+            # Lost a race: another writer set the ABHA ID first — use theirs
+            return db.execute(
+                select(Patient.abha_id).where(Patient.id == patient_uuid)
+            ).scalar_one_or_none()
+
+        logger.info("Generated new ABHA ID for patient: %s", new_abha_id)
         return new_abha_id
-        
+
     except Exception as e:
-        print(f"❌ Error ensuring patient ABHA ID: {str(e)}")
+        logger.error("Error ensuring patient ABHA ID: %s", e)
         return None
 
 
-async def get_mock_health_records(
+def ensure_abha_ids_for_patients(
+    db: Session,
+    patient_uuids: List[uuid.UUID]
+) -> Dict[uuid.UUID, Optional[str]]:
+    """
+    Batched ensure_patient_has_abha_id for bulk paths: one SELECT over the
+    whole set plus one executemany UPDATE for the patients missing an ABHA
+    ID, instead of three round trips per patient.
+
+    Args:
+        db: Database session
+        patient_uuids: Patient UUIDs to check
+
+    Returns:
+        Mapping of patient UUID to its (existing or generated) ABHA ID;
+        unknown UUIDs are absent from the result
+    """
+    try:
+        rows = db.execute(
+            select(Patient.id, Patient.name, Patient.abha_id)
+            .where(Patient.id.in_(patient_uuids))
+        ).all()
+
+        result = {}
+        params = []
+        for pid, name, abha_id in rows:
+            if abha_id:
+                result[pid] = abha_id
+                continue
+            name_prefix = name.split()[0][:3].lower() if name else "pat"
+            new_abha_id = f"patient-{name_prefix}-{str(pid)[:8].lower()}@abdm"
+            params.append({"pid": pid, "new_abha_id": new_abha_id})
+            result[pid] = new_abha_id
+
+        if params:
+            stmt = (
+                update(Patient)
+                .where(Patient.id == bindparam("pid"), Patient.abha_id.is_(None))
+                .values(abha_id=bindparam("new_abha_id"))
+            )
+            try:
+                # Core-level executemany: the ORM session would reinterpret
+                # this as bulk-update-by-PK and drop the NULL guard
+                db.connection().execute(stmt, params)
+                db.commit()
+            except IntegrityError:
+                # Rare collision with an existing ABHA ID: fall back to the
+                # per-patient path, which retries with a suffix
+                db.rollback()
+                for param in params:
+                    result[param["pid"]] = ensure_patient_has_abha_id(db, param["pid"])
+
+        return result
+
+    except Exception as e:
+        logger.error("Error ensuring patient ABHA IDs in bulk: %s", e)
+        return {}
+
+
+# Mock record templates, hoisted to module scope so each call does one dict
+# lookup and one shallow copy per requested type instead of rebuilding the
+# literals. Callers treat records as read-only, so sharing the nested
+# structures is safe.
+_MOCK_RECORD_TEMPLATES = {
+    "PRESCRIPTION": {
+        "type": "PRESCRIPTION",
+        "date": "2026-01-15",
+        "medicines": [
+            {
+                "name": "Amoxicillin",
+                "dosage": "500mg",
+                "frequency": "Twice daily",
+                "duration": "7 days"
+            },
+            {
+                "name": "Vitamin D3",
+                "dosage": "1000 IU",
+                "frequency": "Once daily",
+                "duration": "30 days"
+            }
+        ],
+        "prescribedBy": "Dr. Sharma",
+        "notes": "Take with food"
+    },
+    "DIAGNOSTIC_REPORT": {
+        "type": "DIAGNOSTIC_REPORT",
+        "date": "2026-01-14",
+        "testName": "Complete Blood Count",
+        "testCode": "CBC",
+        "results": {
+            "hemoglobin": {"value": 14.2, "unit": "g/dL", "status": "NORMAL"},
+            "whiteBloodCells": {"value": 7.5, "unit": "K/uL", "status": "NORMAL"},
+            "platelets": {"value": 250, "unit": "K/uL", "status": "NORMAL"}
+        },
+        "testedBy": "Pathology Lab A",
+        "testedDate": "2026-01-14"
+    },
+    "LAB_REPORT": {
+        "type": "LAB_REPORT",
+        "date": "2026-01-10",
+        "testName": "Blood Sugar Level",
+        "result": "120 mg/dL",
+        "status": "ELEVATED",
+        "labName": "Apollo Diagnostics",
+        "referenceRange": "70-100 mg/dL"
+    },
+    "IMMUNIZATION": {
+        "type": "IMMUNIZATION",
+        "date": "2026-01-05",
+        "vaccines": [
+            {
+                "name": "COVID-19",
+                "dose": "Dose 3 (Booster)",
+                "date": "2026-01-05",
+                "manufacturer": "Covaxin"
+            }
+        ],
+        "administeredBy": "Hospital Vaccination Center"
+    },
+}
+
+
+def get_mock_health_records(
     patient_id: str,
     data_types: List[str],
     care_context_ids: List[str] = None
@@ -114,79 +286,105 @@ async def get_mock_health_records(
     Returns:
         List of mock health record objects
     """
-    records = []
-    
-    if "PRESCRIPTION" in data_types:
-        records.append({
-            "type": "PRESCRIPTION",
-            "date": "2026-01-15",
-            "careContextId": care_context_ids[0] if care_context_ids else "cc-001",
-            "medicines": [
-                {
-                    "name": "Amoxicillin",
-                    "dosage": "500mg",
-                    "frequency": "Twice daily",
-                    "duration": "7 days"
-                },
-                {
-                    "name": "Vitamin D3",
-                    "dosage": "1000 IU",
-                    "frequency": "Once daily",
-                    "duration": "30 days"
-                }
-            ],
-            "prescribedBy": "Dr. Sharma",
-            "notes": "Take with food"
-        })
-    
-    if "DIAGNOSTIC_REPORT" in data_types:
-        records.append({
-            "type": "DIAGNOSTIC_REPORT",
-            "date": "2026-01-14",
-            "careContextId": care_context_ids[0] if care_context_ids else "cc-001",
-            "testName": "Complete Blood Count",
-            "testCode": "CBC",
-            "results": {
-                "hemoglobin": {"value": 14.2, "unit": "g/dL", "status": "NORMAL"},
-                "whiteBloodCells": {"value": 7.5, "unit": "K/uL", "status": "NORMAL"},
-                "platelets": {"value": 250, "unit": "K/uL", "status": "NORMAL"}
-            },
-            "testedBy": "Pathology Lab A",
-            "testedDate": "2026-01-14"
-        })
-    
-    if "LAB_REPORT" in data_types:
-        records.append({
-            "type": "LAB_REPORT",
-            "date": "2026-01-10",
-            "careContextId": care_context_ids[0] if care_context_ids else "cc-001",
-            "testName": "Blood Sugar Level",
-            "result": "120 mg/dL",
-            "status": "ELEVATED",
-            "labName": "Apollo Diagnostics",
-            "referenceRange": "70-100 mg/dL"
-        })
-    
-    if "IMMUNIZATION" in data_types:
-        records.append({
-            "type": "IMMUNIZATION",
-            "date": "2026-01-05",
-            "careContextId": care_context_ids[0] if care_context_ids else "cc-001",
-            "vaccines": [
-                {
-                    "name": "COVID-19",
-                    "dose": "Dose 3 (Booster)",
-                    "date": "2026-01-05",
-                    "manufacturer": "Covaxin"
-                }
-            ],
-            "administeredBy": "Hospital Vaccination Center"
-        })
-    
-    return records
+    care_context_id = care_context_ids[0] if care_context_ids else "cc-001"
+    return [
+        {**_MOCK_RECORD_TEMPLATES[data_type], "careContextId": care_context_id}
+        for data_type in data_types
+        if data_type in _MOCK_RECORD_TEMPLATES
+    ]
+
+
+@lru_cache(maxsize=256)
+def _parse_record_date(value: str) -> datetime:
+    """Parse an ISO date string. Cached: webhook batches repeat the same
+    date across many records, so most calls are dict hits."""
+    return datetime.fromisoformat(value)
+
+
+# Background flush queue for webhook record inserts. A burst of gateway
+# webhooks used to mean one commit (and fsync) per webhook; instead the
+# rows go on a single asyncio.Queue drained by one task that coalesces a
+# short window into one multi-row INSERT and one commit. Same queue +
+# consumer-task shape as the visit consent worker.
+#
+# Durability: a True return means the rows were accepted for the next
+# flush, not that they are committed yet — a crash inside the flush
+# window (<= _FLUSH_INTERVAL) can lose queued rows. Callers that ran
+# before the worker starts fall back to a direct synchronous commit.
+_FLUSH_INTERVAL = 0.05
+_FLUSH_MAX_ROWS = 500
+_insert_queue: Optional[asyncio.Queue] = None
+_insert_loop: Optional[asyncio.AbstractEventLoop] = None
+_flush_task = None
 
 
-async def store_received_health_data(
+def _flush_rows(rows: List[Dict[str, Any]]) -> None:
+    """One executemany INSERT + one commit for a drained batch."""
+    from app.database.connection import SessionLocal
+    db = SessionLocal()
+    try:
+        db.execute(insert(HealthRecord), rows)
+        db.commit()
+        logger.info("Flushed %d queued health records", len(rows))
+    except Exception as e:
+        logger.error("Error flushing queued health records: %s", e)
+        db.rollback()
+    finally:
+        db.close()
+
+
+async def _record_flush_worker():
+    """Drain the insert queue for the lifetime of the app."""
+    loop = asyncio.get_running_loop()
+    while True:
+        rows = [await _insert_queue.get()]
+        # Let the rest of a burst accumulate before committing
+        deadline = loop.time() + _FLUSH_INTERVAL
+        while len(rows) < _FLUSH_MAX_ROWS:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                rows.append(await asyncio.wait_for(_insert_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        _flush_rows(rows)
+        for _ in rows:
+            _insert_queue.task_done()
+
+
+async def start_record_flush_worker():
+    """Create the queue and consumer task; called from app startup."""
+    global _insert_queue, _insert_loop, _flush_task
+    _insert_queue = asyncio.Queue()
+    _insert_loop = asyncio.get_running_loop()
+    _flush_task = asyncio.create_task(_record_flush_worker())
+
+
+async def stop_record_flush_worker():
+    """Cancel the consumer task and flush what's left; called from shutdown."""
+    global _flush_task
+    if _flush_task:
+        _flush_task.cancel()
+        _flush_task = None
+    if _insert_queue is not None:
+        remaining = []
+        while not _insert_queue.empty():
+            remaining.append(_insert_queue.get_nowait())
+        if remaining:
+            _flush_rows(remaining)
+
+
+def _enqueue_record_rows(rows: List[Dict[str, Any]]) -> bool:
+    if _insert_queue is None or _insert_loop is None:
+        return False
+    for row in rows:
+        # Sync handlers run in the threadpool, so hop to the loop thread.
+        _insert_loop.call_soon_threadsafe(_insert_queue.put_nowait, row)
+    return True
+
+
+def store_received_health_data(
     db: Session,
     patient_identifier: str,
     records: List[Dict[str, Any]],
@@ -202,44 +400,50 @@ async def store_received_health_data(
         records: List of health records received
         source_hospital: Bridge ID of source hospital
         request_id: Gateway request ID for tracking
-        
+
     Returns:
-        True if all records were stored successfully
+        True if all records were stored (or queued for the next batched
+        flush when the background worker is running)
     """
     try:
         patient = _get_or_create_patient_by_identifier(db, patient_identifier)
         if not patient:
-            print(f"⚠️  Patient {patient_identifier} not found and could not be created")
+            logger.warning("Patient %s not found and could not be created", patient_identifier)
             return False
         
-        stored_count = 0
-        
-        for record_data in records:
-            record_type = record_data.get("type", "UNKNOWN")
-            
-            health_record = HealthRecord(
-                id=uuid.uuid4(),
-                patient_id=patient.id,
-                record_type=record_type,
-                record_date=datetime.fromisoformat(record_data.get("date", datetime.now(timezone.utc).isoformat())),
-                data_json=record_data,
-                source_hospital=source_hospital,
-                request_id=request_id,
-                was_encrypted=False,
-                decryption_status="NONE",
-                delivery_attempt=1,
-                last_delivery_timestamp=datetime.now(timezone.utc)
-            )
-            
-            db.add(health_record)
-            stored_count += 1
-        
+        # One executemany INSERT for the whole batch instead of a db.add per
+        # record: skips per-row unit-of-work bookkeeping and collapses N
+        # INSERT round trips into one.
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "patient_id": patient.id,
+                "record_type": record_data.get("type", "UNKNOWN"),
+                "record_date": _parse_record_date(record_data["date"]) if record_data.get("date") else now,
+                "data_json": record_data,
+                "source_hospital": source_hospital,
+                "request_id": request_id,
+                "was_encrypted": False,
+                "decryption_status": "NONE",
+                "delivery_attempt": 1,
+                "last_delivery_timestamp": now,
+            }
+            for record_data in records
+        ]
+        stored_count = len(rows)
+
+        if rows:
+            if _enqueue_record_rows(rows):
+                logger.info("Queued %d health records for patient %s from %s", stored_count, patient_identifier, source_hospital)
+                return True
+            db.execute(insert(HealthRecord), rows)
         db.commit()
-        print(f"✅ Stored {stored_count} health records for patient {patient_identifier} from {source_hospital}")
+        logger.info("Stored %d health records for patient %s from %s", stored_count, patient_identifier, source_hospital)
         return True
         
     except Exception as e:
-        print(f"❌ Error storing health records: {str(e)}")
+        logger.error("Error storing health records: %s", e)
         db.rollback()
         return False
 
@@ -274,11 +478,11 @@ async def decrypt_and_store_health_data(
         records = decrypted_data.get("records", [])
         
         if not records:
-            print(f"⚠️  No records found in decrypted data")
+            logger.warning("No records found in decrypted data")
             return False
         
         # Store the decrypted records
-        return await store_received_health_data(
+        return store_received_health_data(
             db=db,
             patient_identifier=patient_id,
             records=records,
@@ -287,78 +491,81 @@ async def decrypt_and_store_health_data(
         )
         
     except Exception as e:
-        print(f"❌ Error decrypting and storing health data: {str(e)}")
+        logger.error("Error decrypting and storing health data: %s", e)
         return False
 
 
-async def get_health_records_for_patient(
+def get_health_records_for_patient(
     db: Session,
     patient_id: str,
     record_type: str = None,
-    source_hospital: str = None
+    source_hospital: str = None,
+    limit: int = None,
+    offset: int = 0
 ) -> List[Dict[str, Any]]:
     """
     Get health records for a patient by UUID.
     This is the primary method for local queries.
-    
+
     Args:
         db: Database session
         patient_id: Patient UUID or ABHA ID
         record_type: Optional filter by record type
         source_hospital: Optional filter by source hospital
-        
+        limit: Optional page size; bounds memory for record-heavy patients
+        offset: Number of records to skip when paginating
+
     Returns:
-        List of health records
+        List of health records, newest first
     """
     try:
-        patient_uuid = None
-        patient = None
-        
-        # First try UUID
+        # Resolve the patient exactly once; every downstream query reuses the
+        # resolved row and its UUID instead of re-querying by identifier.
         try:
             patient_uuid = uuid.UUID(patient_id)
-            query = select(HealthRecord).where(HealthRecord.patient_id == patient_uuid)
+            patient = db.get(Patient, patient_uuid)
         except ValueError:
-            # If not UUID, try to find by ABHA ID
-            patient = db.execute(
-                select(Patient).where(Patient.abha_id == patient_id)
-            ).scalar_one_or_none()
-            
+            # Not a UUID: look up by ABHA ID
+            patient = db.execute(_patient_by_abha_stmt(patient_id)).scalar_one_or_none()
+
             if not patient:
                 return []
-            
+
             patient_uuid = patient.id
-            query = select(HealthRecord).where(HealthRecord.patient_id == patient.id)
-        
-        # Get patient info if not already fetched
-        if not patient:
-            patient = db.execute(select(Patient).where(Patient.id == patient_uuid)).scalar_one_or_none()
-        
-        # Apply optional filters
-        if record_type:
-            query = query.where(HealthRecord.record_type == record_type)
-        
-        if source_hospital:
-            query = query.where(HealthRecord.source_hospital == source_hospital)
-        
-        records = db.execute(query).scalars().all()
-        
-        result = []
-        for record in records:
-            data = record.data_json or {}
-            
-            # Try to find care context for this record (by naming convention)
-            context_name = f"{record.record_type}_{record.record_date.date().isoformat()}_{str(record.id)[:8]}"
-            care_context = db.execute(
-                select(CareContext).where(
+
+        records = db.execute(
+            _records_for_patient_stmt(patient_uuid, record_type, source_hospital, limit, offset)
+        ).scalars().all()
+
+        # Most records carry the care_context_id FK directly. Legacy rows
+        # predating it fall back to the naming-convention match, resolved in
+        # one IN query for the whole batch.
+        context_names = {
+            record.id: f"{record.record_type}_{record.record_date.date().isoformat()}_{str(record.id)[:8]}"
+            for record in records
+            if record.care_context_id is None
+        }
+        ctx_map = {}
+        if context_names:
+            ctx_rows = db.execute(
+                select(CareContext.context_name, CareContext.id).where(
                     and_(
-                        CareContext.patient_id == record.patient_id,
-                        CareContext.context_name == context_name
+                        CareContext.patient_id == patient_uuid,
+                        CareContext.context_name.in_(context_names.values())
                     )
                 )
-            ).scalar_one_or_none()
-            care_context_id = str(care_context.id) if care_context else None
-            
+            ).all()
+            ctx_map = {row.context_name: str(row.id) for row in ctx_rows}
+
+        result = []
+        for record in records:
+            data = record.data_json or {}
+
+            if record.care_context_id:
+                care_context_id = str(record.care_context_id)
+            else:
+                care_context_id = ctx_map.get(context_names[record.id])
+
             # Extract visit_id from data_json if present
             visit_id = data.get('visitId') or data.get('visit_id')
             
@@ -387,11 +594,11 @@ async def get_health_records_for_patient(
         return result
         
     except Exception as e:
-        print(f"❌ Error getting health records: {str(e)}")
+        logger.error("Error getting health records: %s", e)
         return []
 
 
-async def get_patient_complete_history(
+def get_patient_complete_history(
     db: Session,
     patient_identifier: str
 ) -> Dict[str, Any]:
@@ -421,16 +628,16 @@ async def get_patient_complete_history(
         except ValueError:
             patient_abha = patient_identifier
         
-        # Query patient
+        # Query patient with records eagerly loaded: selectinload batches the
+        # health_records fetch into the same execute instead of a separate
+        # round trip later.
+        stmt = select(Patient).options(selectinload(Patient.health_records))
         if patient_uuid:
-            patient = db.execute(
-                select(Patient).where(Patient.id == patient_uuid)
-            ).scalar_one_or_none()
+            stmt = stmt.where(Patient.id == patient_uuid)
         else:
-            patient = db.execute(
-                select(Patient).where(Patient.abha_id == patient_abha)
-            ).scalar_one_or_none()
-        
+            stmt = stmt.where(Patient.abha_id == patient_abha)
+        patient = db.execute(stmt).scalar_one_or_none()
+
         if not patient:
             return {
                 "patient": None,
@@ -441,18 +648,35 @@ async def get_patient_complete_history(
                 "error": f"Patient not found: {patient_identifier}"
             }
         
-        # Get all records for this patient
-        all_records = db.execute(
-            select(HealthRecord).where(HealthRecord.patient_id == patient.id)
-        ).scalars().all()
-        
-        # Separate local and external records
-        local_records = []
-        external_records = []
+        # Summary counts come from one grouped aggregate over the composite
+        # (patient_id, record_type) index — O(distinct type/source pairs) in
+        # Python instead of count bookkeeping on every record. SQLite has no
+        # ROLLUP, so the totals are summed from the grouped rows.
         record_types = {}
         source_hospitals = {}
-        
-        for record in all_records:
+        total_count = 0
+        local_count = 0
+        grouped = db.execute(
+            select(HealthRecord.record_type, HealthRecord.source_hospital, func.count())
+            .where(HealthRecord.patient_id == patient.id)
+            .group_by(HealthRecord.record_type, HealthRecord.source_hospital)
+        ).all()
+        for rec_type, source, count in grouped:
+            record_types[rec_type] = record_types.get(rec_type, 0) + count
+            total_count += count
+            if source:
+                source_hospitals[source] = source_hospitals.get(source, 0) + count
+            else:
+                local_count += count
+
+        # One pass builds each record dict once; localRecords/externalRecords
+        # hold references into allRecords rather than copies, so memory stays
+        # O(N dicts) instead of materializing the combined list again.
+        all_records = []
+        local_records = []
+        external_records = []
+
+        for record in patient.health_records:
             record_dict = {
                 "id": str(record.id),
                 "type": record.record_type,
@@ -462,15 +686,13 @@ async def get_patient_complete_history(
                 "receivedAt": record.created_at.isoformat(),
                 "requestId": record.request_id
             }
-            
+            all_records.append(record_dict)
+
             if record.source_hospital:
                 external_records.append(record_dict)
-                source_hospitals[record.source_hospital] = source_hospitals.get(record.source_hospital, 0) + 1
             else:
                 local_records.append(record_dict)
-            
-            record_types[record.record_type] = record_types.get(record.record_type, 0) + 1
-        
+
         return {
             "patient": {
                 "id": str(patient.id),
@@ -481,11 +703,11 @@ async def get_patient_complete_history(
             },
             "localRecords": local_records,
             "externalRecords": external_records,
-            "allRecords": local_records + external_records,
+            "allRecords": all_records,
             "summary": {
-                "totalRecords": len(all_records),
-                "localCount": len(local_records),
-                "externalCount": len(external_records),
+                "totalRecords": total_count,
+                "localCount": local_count,
+                "externalCount": total_count - local_count,
                 "byType": record_types,
                 "bySource": source_hospitals,
                 "lastUpdated": datetime.now(timezone.utc).isoformat()
@@ -493,7 +715,7 @@ async def get_patient_complete_history(
         }
         
     except Exception as e:
-        print(f"❌ Error getting patient complete history: {str(e)}")
+        logger.error("Error getting patient complete history: %s", e)
         return {
             "patient": None,
             "localRecords": [],
@@ -503,61 +725,8 @@ async def get_patient_complete_history(
             "error": str(e)
         }
 
-    """
-    Retrieve health records for a patient.
-    
-    Args:
-        db: Database session
-        patient_id: Patient identifier
-        record_type: Optional filter by record type
-        source_hospital: Optional filter by source hospital
-        
-    Returns:
-        List of health records
-    """
-    try:
-        # Convert patient_id to UUID
-        patient_uuid = uuid.UUID(patient_id)
-        
-        # Get patient info
-        patient = db.execute(
-            select(Patient).where(Patient.id == patient_uuid)
-        ).scalar_one_or_none()
-        
-        query = select(HealthRecord).where(HealthRecord.patient_id == patient_uuid)
-        
-        if record_type:
-            query = query.where(HealthRecord.record_type == record_type)
-        
-        if source_hospital:
-            query = query.where(HealthRecord.source_hospital == source_hospital)
-        
-        query = query.order_by(HealthRecord.record_date.desc())
-        
-        results = db.execute(query).scalars().all()
-        
-        return [
-            {
-                "id": str(record.id),
-                "type": record.record_type,
-                "date": record.record_date.isoformat(),
-                "sourceHospital": record.source_hospital,
-                "data": record.data_json,
-                "receivedAt": record.created_at.isoformat(),
-                # Additional fields for frontend
-                "patientId": str(patient.id) if patient else patient_id,
-                "patientName": patient.name if patient else "Unknown",
-                "title": record.data_json.get("testName") or record.data_json.get("reportType") or f"{record.record_type} Record"
-            }
-            for record in results
-        ]
-        
-    except Exception as e:
-        print(f"❌ Error retrieving health records: {str(e)}")
-        return []
-
 
-async def get_external_health_records(
+def get_external_health_records(
     db: Session,
     patient_id: str
 ) -> List[Dict[str, Any]]:
@@ -576,12 +745,12 @@ async def get_external_health_records(
         patient_uuid = uuid.UUID(patient_id)
         
         results = db.execute(
-            select(HealthRecord).where(
+            lambda_stmt(lambda: select(HealthRecord).where(
                 and_(
                     HealthRecord.patient_id == patient_uuid,
                     HealthRecord.source_hospital.isnot(None)
                 )
-            ).order_by(HealthRecord.record_date.desc())
+            ).order_by(HealthRecord.record_date.desc()))
         ).scalars().all()
         
         return [
@@ -598,11 +767,11 @@ async def get_external_health_records(
         ]
         
     except Exception as e:
-        print(f"❌ Error retrieving external health records: {str(e)}")
+        logger.error("Error retrieving external health records: %s", e)
         return []
 
 
-async def get_health_record_summary(
+def get_health_record_summary(
     db: Session,
     patient_id: str
 ) -> Dict[str, Any]:
@@ -617,31 +786,61 @@ async def get_health_record_summary(
         Summary with counts by type and source
     """
     try:
-        all_records = await get_health_records_for_patient(db, patient_id)
-        
-        summary = {
-            "totalRecords": len(all_records),
-            "byType": {},
-            "bySource": {},
+        # Counting is done with GROUP BY in the database — no need to
+        # materialize every record (and its care-context lookup) just to
+        # tally types and sources.
+        try:
+            patient_uuid = uuid.UUID(patient_id)
+        except ValueError:
+            patient_uuid = db.execute(
+                select(Patient.id).where(Patient.abha_id == patient_id)
+            ).scalar_one_or_none()
+
+        by_type = {}
+        by_source = {}
+        if patient_uuid:
+            by_type = dict(db.execute(
+                select(HealthRecord.record_type, func.count())
+                .where(HealthRecord.patient_id == patient_uuid)
+                .group_by(HealthRecord.record_type)
+            ).all())
+            source = func.coalesce(HealthRecord.source_hospital, "LOCAL")
+            by_source = dict(db.execute(
+                select(source, func.count())
+                .where(HealthRecord.patient_id == patient_uuid)
+                .group_by(source)
+            ).all())
+
+        return {
+            "totalRecords": sum(by_type.values()),
+            "byType": by_type,
+            "bySource": by_source,
             "lastUpdated": datetime.now(timezone.utc).isoformat()
         }
-        
-        for record in all_records:
-            # Count by type
-            record_type = record.get("type")
-            summary["byType"][record_type] = summary["byType"].get(record_type, 0) + 1
-            
-            # Count by source - convert None to "LOCAL"
-            source = record.get("sourceHospital") or "LOCAL"
-            summary["bySource"][source] = summary["bySource"].get(source, 0) + 1
-        
-        return summary
-        
+
     except Exception as e:
-        print(f"❌ Error generating health record summary: {str(e)}")
+        logger.error("Error generating health record summary: %s", e)
         return {"totalRecords": 0, "byType": {}, "bySource": {}}
 
 
+# The bridge ID is constant per deployment, so resolve it once an hour
+# instead of on every care-context creation (same cache as the visit
+# consent path keeps).
+_BRIDGE_ID_TTL = 3600.0
+_bridge_id_cache = None
+
+
+def _get_bridge_id() -> str:
+    global _bridge_id_cache
+    now = monotonic()
+    if _bridge_id_cache and _bridge_id_cache[0] > now:
+        return _bridge_id_cache[1]
+    from app.services.gateway_service import TokenManager
+    bridge_id = TokenManager.get_bridge_details()[0]
+    _bridge_id_cache = (now + _BRIDGE_ID_TTL, bridge_id)
+    return bridge_id
+
+
 async def create_care_context_for_record(
     db: Session,
     patient_id: uuid.UUID,
@@ -669,7 +868,7 @@ async def create_care_context_for_record(
         ).scalar_one_or_none()
         
         if not patient:
-            print(f"❌ Patient {patient_id} not found for care context creation")
+            logger.error("Patient %s not found for care context creation", patient_id)
             return None
         
         # Create a meaningful care context name
@@ -687,7 +886,12 @@ async def create_care_context_for_record(
         ).scalar_one_or_none()
         
         if existing_context:
-            print(f"✓ Care context already exists: {existing_context.id}")
+            # Backfill the FK on legacy records as they come through
+            record = db.get(HealthRecord, record_id)
+            if record and record.care_context_id is None:
+                record.care_context_id = existing_context.id
+                db.commit()
+            logger.debug("Care context already exists: %s", existing_context.id)
             return {
                 "careContext": {
                     "id": str(existing_context.id),
@@ -706,19 +910,24 @@ async def create_care_context_for_record(
         )
         
         db.add(new_context)
+        # Record the link on the health record itself so reads resolve it by
+        # FK instead of reconstructing the naming convention
+        record = db.get(HealthRecord, record_id)
+        if record:
+            record.care_context_id = new_context.id
         db.commit()
         db.refresh(new_context)
-        
-        print(f"✓ Created care context: {new_context.id} for record {record_id}")
+
+        logger.info("Created care context: %s for record %s", new_context.id, record_id)
         
         # Link to gateway if patient has ABHA ID
         gateway_response = None
         if patient.abha_id:
             try:
-                from app.services.gateway_service import TokenManager, generate_link_token, init_link
-                
+                from app.services.gateway_service import generate_link_token, init_link
+
                 # Step 1: Create linking request in gateway (creates LinkingRequest row)
-                bridge_id = TokenManager.get_bridge_details()[0]
+                bridge_id = _get_bridge_id()
                 try:
                     link_token_resp = await generate_link_token(patient.abha_id)
                     txn_id = None
@@ -731,12 +940,12 @@ async def create_care_context_for_record(
                             "txnId": txn_id,
                             "hipId": bridge_id,
                         })
-                        print(f"✓ Linking request created/linked in gateway: txnId={txn_id}")
+                        logger.info("Linking request created/linked in gateway: txnId=%s", txn_id)
                     else:
-                        print(f"⚠️  Link token generation did not return txnId: {link_token_resp}")
+                        logger.warning("Link token generation did not return txnId: %r", link_token_resp)
                 except Exception as e:
                     # Non-fatal: care context linking can still proceed
-                    print(f"⚠️  Failed to create linking request in gateway: {str(e)}")
+                    logger.warning("Failed to create linking request in gateway: %s", e)
                 
                 # Step 2: Link care context to gateway
                 payload = {
@@ -748,13 +957,13 @@ async def create_care_context_for_record(
                 }
                 
                 gateway_response = await link_care_contexts_to_gateway(payload)
-                print(f"✓ Linked care context {new_context.id} to gateway for patient {patient.abha_id}")
+                logger.info("Linked care context %s to gateway for patient %s", new_context.id, patient.abha_id)
                 
             except Exception as e:
-                print(f"⚠️  Failed to link care context to gateway: {str(e)}")
+                logger.warning("Failed to link care context to gateway: %s", e)
                 gateway_response = {"error": str(e), "status": "FAILED"}
         else:
-            print(f"⚠️  Patient has no ABHA ID, skipping gateway linking")
+            logger.warning("Patient has no ABHA ID, skipping gateway linking")
             gateway_response = {"status": "SKIPPED", "reason": "No ABHA ID"}
         
         return {
@@ -768,6 +977,39 @@ async def create_care_context_for_record(
         }
         
     except Exception as e:
-        print(f"❌ Error creating care context for record: {str(e)}")
+        logger.error("Error creating care context for record: %s", e)
         db.rollback()
         return {"error": str(e), "created": False}
+
+
+async def create_care_contexts_for_records(
+    db: Session,
+    patient_id: uuid.UUID,
+    records: List[Dict[str, Any]]
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Create care contexts for a batch of records concurrently.
+
+    The gateway round trips dominate create_care_context_for_record, so
+    fanning the batch out with asyncio.gather costs roughly the slowest
+    call instead of the sum. The per-record DB work happens between awaits
+    and never interleaves, so sharing the session is safe.
+
+    Args:
+        db: Database session
+        patient_id: Patient UUID
+        records: List of dicts with record_id, record_type and record_date
+
+    Returns:
+        One create_care_context_for_record result per input record
+    """
+    return await asyncio.gather(*(
+        create_care_context_for_record(
+            db=db,
+            patient_id=patient_id,
+            record_id=record["record_id"],
+            record_type=record["record_type"],
+            record_date=record["record_date"]
+        )
+        for record in records
+    ))